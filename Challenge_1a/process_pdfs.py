@@ -1,11 +1,18 @@
-# --- Modified version with nlp_utils integrated ---
+# --- Modified version with the shared pdf_pipeline package ---
 
-import os
+import argparse
 import json
-import fitz  # PyMuPDF
+import sys
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
 from pathlib import Path
 import time
-from pdf_processor_pipeline import extract_document_outline
+
+# The shared pdf_pipeline package sits next to this script in Docker and at the repo root in a checkout
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from pdf_pipeline import (extract_document_outline, apply_output_profile, profile_needs_nlp, OUTPUT_PROFILES,
+                          iter_pdf_sources, DECODE_PROFILES, decode_options, benchmark_decode, document_profiler,
+                          require_keyword_backend)
+from pdf_pipeline.metrics import METRICS, record_document
 
 INPUT_DIR = Path("/app/input")
 OUTPUT_DIR = Path("/app/output")
@@ -14,32 +21,167 @@ OUTPUT_DIR = Path("/app/output")
 # OUTPUT_DIR = Path("Challenge_1a/sample_dataset/outputs11")
 
 
+# ------------------------ Single Document ------------------------
+def process_one(name: str, source, output_dir: Path, profile: str = "full", extract_options=None,
+                profiling=None):
+    # source is a Path or the PDF bytes read from an archive; extract_options go to extract_document_outline,
+    # profiling to document_profiler
+    start_time = time.time()
+
+    stats = {}
+    with document_profiler(name, **(profiling or {})):
+        extracted_data = extract_document_outline(source, with_nlp=profile_needs_nlp(profile), name=name,
+                                                  stats=stats, **(extract_options or {}))
+    extracted_data = apply_output_profile(extracted_data, profile)
+
+    elapsed = time.time() - start_time
+
+    output_file = output_dir / f"{Path(name).stem}.json"
+    with open(output_file, "w", encoding="utf-8") as f:
+        json.dump(extracted_data, f, indent=2)
+    return output_file, elapsed, stats
+
+
 # ------------------------ Batch Processing ------------------------
-def process_pdfs():
-    OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
-    pdf_files = list(INPUT_DIR.glob("*.pdf"))
+def process_pdfs(input_dir: Path = INPUT_DIR, output_dir: Path = OUTPUT_DIR, workers: int = 1,
+                 profile: str = "full", pattern: str = "*.pdf", skip_existing: bool = False,
+                 page_workers: int = 1, profiling=None, metrics_file: Path = None, **extract_options):
+    output_dir.mkdir(parents=True, exist_ok=True)
+    extract_options["workers"] = page_workers
 
-    if not pdf_files:
-        print(f"No PDF files found in {INPUT_DIR}")
-        return
+    def is_current(name, mtime):
+        # Partial reprocessing: keep outputs that are newer than their PDF
+        output_file = output_dir / f"{Path(name).stem}.json"
+        return output_file.exists() and output_file.stat().st_mtime >= mtime
 
-    for pdf_file in pdf_files:
-        print(f"\n\u23F3 Processing {pdf_file.name}...")
-        start_time = time.time()
+    # input_dir may also be a zip/tar bundle; its PDFs are read into memory, not extracted
+    pdf_sources = iter_pdf_sources(input_dir, pattern, skip=is_current if skip_existing else None)
 
-        extracted_data = extract_document_outline(pdf_file)
+    def record(elapsed, stats, queued=0):
+        # Workers return their stats; only this process touches METRICS
+        record_document(stats, elapsed)
+        METRICS.set_gauge("queue_depth", queued)
+        if metrics_file:
+            METRICS.write_prometheus(metrics_file)
 
-        end_time = time.time()
-        elapsed = end_time - start_time
+    processed = 0
+    if workers > 1:
+        print(f"⏳ Processing PDFs from {input_dir} with {workers} workers...")
 
-        output_file = OUTPUT_DIR / f"{pdf_file.stem}.json"
-        with open(output_file, "w", encoding="utf-8") as f:
-            json.dump(extracted_data, f, indent=2)
+        def finish(done, in_flight):
+            for future in done:
+                output_file, elapsed, stats = future.result()
+                record(elapsed, stats, queued=len(in_flight))
+                print(f"✅ Done: {output_file.name} (Processed in {elapsed:.2f} seconds)")
+            return len(done)
 
+        # Submit lazily: archive members are only read when submitted, so at most
+        # 2 * workers PDFs are held in memory (and pickled to the pool) at a time
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            in_flight = set()
+            for name, source in pdf_sources:
+                in_flight.add(pool.submit(process_one, name, source, output_dir, profile, extract_options,
+                                          profiling))
+                if len(in_flight) >= 2 * workers:
+                    done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    processed += finish(done, in_flight)
+            while in_flight:
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                processed += finish(done, in_flight)
+        if not processed:
+            print(f"No PDF files found in {input_dir}")
+        return
+
+    for name, source in pdf_sources:
+        print(f"\n⏳ Processing {name}...")
+        output_file, elapsed, stats = process_one(name, source, output_dir, profile, extract_options, profiling)
+        record(elapsed, stats)
+        processed += 1
         print(f"✅ Done: {output_file.name} (Processed in {elapsed:.2f} seconds)")
+    if not processed:
+        print(f"No PDF files found in {input_dir}")
+
+
+# ------------------------ Decode Benchmark ------------------------
+def benchmark_pdfs(input_dir: Path, output_dir: Path, pattern: str = "*.pdf", clip_margins=None):
+    output_dir.mkdir(parents=True, exist_ok=True)
+    report = {}
+    for name, source in iter_pdf_sources(input_dir, pattern):
+        report[name] = benchmark_decode(source, clip_margins=clip_margins)
+        rows = ", ".join(f"{profile} {row['sec']:.3f}s ({row.get('speedup', 1.0)}x, {row['lines']} lines)"
+                         for profile, row in report[name].items())
+        print(f"⏱️  {name}: {rows}")
+
+    report_file = output_dir / "decode_benchmark.json"
+    with open(report_file, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"📊 Decode benchmark written to {report_file}")
+
 
 # ------------------------ Entry Point ------------------------
+def build_parser():
+    parser = argparse.ArgumentParser(description="Challenge 1A PDF outline extraction")
+    parser.add_argument("--input-dir", type=Path, default=INPUT_DIR,
+                        help="Directory of PDFs, or a .zip/.tar(.gz) bundle read without unpacking")
+    parser.add_argument("--output-dir", type=Path, default=OUTPUT_DIR)
+    parser.add_argument("--workers", type=int, default=1, help="Documents processed in parallel")
+    parser.add_argument("--page-workers", type=int, default=1,
+                        help="Processes splitting the pages of one long PDF (used from 25 pages per worker)")
+    parser.add_argument("--toc-first", action="store_true",
+                        help="Take headings from the PDF bookmarks when they look complete")
+    parser.add_argument("--strip-boilerplate", action="store_true",
+                        help="Remove running headers/footers (lines repeated in the page margins)")
+    parser.add_argument("--decode", choices=DECODE_PROFILES, default="default",
+                        help="text = no image blocks; text-fast = also expand ligatures and normalize whitespace")
+    parser.add_argument("--clip-margins", type=float, nargs=4, metavar=("LEFT", "TOP", "RIGHT", "BOTTOM"),
+                        help="Ignore page margins of this many points when decoding text")
+    parser.add_argument("--keywords", choices=("yake", "tfidf"), default="yake",
+                        help="yake = per section; tfidf = one TF-IDF model (1-3-grams) over each document's sections")
+    parser.add_argument("--benchmark-decode", action="store_true",
+                        help="Time each decode profile against the default and write decode_benchmark.json")
+    # --profile is the old name, kept as a deprecated alias (same flag name as in 1B now)
+    parser.add_argument("--output-profile", "--profile", dest="output_profile", choices=OUTPUT_PROFILES, default="full",
+                        help="full = with NLP annotations, outline = no NLP, schema = title + level/text/page only")
+    parser.add_argument("--profile-dir", type=Path,
+                        help="Write cProfile + tracemalloc artifacts per document (<name>.prof, <name>.profile.txt)")
+    parser.add_argument("--profile-docs", nargs="+", metavar="GLOB",
+                        help="Only profile these documents (names or globs)")
+    parser.add_argument("--profile-threshold", type=float, metavar="SECONDS",
+                        help="Profile every document but keep artifacts only for those slower than this")
+    parser.add_argument("--metrics-file", type=Path,
+                        help="Prometheus text file rewritten after every document (e.g. for a textfile collector)")
+    parser.add_argument("--metrics-port", type=int, help="Serve Prometheus metrics on http://HOST:PORT/metrics")
+    parser.add_argument("--metrics-host", default="127.0.0.1",
+                        help="Interface for --metrics-port (0.0.0.0 to scrape from outside a container)")
+    parser.add_argument("--pattern", default="*.pdf", help="Glob selecting which PDFs to process")
+    parser.add_argument("--skip-existing", action="store_true",
+                        help="Skip PDFs whose JSON output is already newer than the PDF")
+    return parser
+
 if __name__ == "__main__":
+    parser = build_parser()
+    args = parser.parse_args()
+    if "--profile" in sys.argv[1:] or any(arg.startswith("--profile=") for arg in sys.argv[1:]):
+        print("⚠️ --profile is deprecated, use --output-profile")
+    try:
+        require_keyword_backend(args.keywords)
+    except ImportError as e:
+        parser.error(str(e))
+    if args.benchmark_decode:
+        benchmark_pdfs(args.input_dir, args.output_dir, args.pattern, args.clip_margins)
+        sys.exit(0)
+    if args.metrics_port:
+        METRICS.serve(args.metrics_port, args.metrics_host)
     print("Starting processing pdfs")
-    process_pdfs()
+    process_pdfs(args.input_dir, args.output_dir, workers=args.workers, profile=args.output_profile,
+                 pattern=args.pattern, skip_existing=args.skip_existing,
+                 page_workers=args.page_workers, toc_first=args.toc_first,
+                 strip_boilerplate=args.strip_boilerplate,
+                 decode=decode_options(args.decode, args.clip_margins), keywords=args.keywords,
+                 profiling={"artifact_dir": args.profile_dir, "docs": args.profile_docs,
+                            "threshold": args.profile_threshold},
+                 metrics_file=args.metrics_file)
     print("Completed processing pdfs")
+    if args.metrics_file or args.metrics_port:
+        METRICS.print_summary()
+        METRICS.write_summary(args.output_dir / "metrics_summary.json")
@@ -0,0 +1,105 @@
+import time
+
+import torch
+
+# ------------------------ Length-Bucketed Encoding ------------------------
+def token_lengths(model, texts, max_seq_length=None):
+    max_len = max_seq_length or model.max_seq_length
+    encoded = model.tokenizer(list(texts), add_special_tokens=True, truncation=False)["input_ids"]
+    return [len(ids) for ids in encoded], max_len
+
+def make_batches(lengths, max_len, token_budget=8192, max_batch_size=128) -> list:
+    # Sort by token length and grow each batch while its padded size fits the budget
+    order = sorted(range(len(lengths)), key=lambda i: lengths[i])
+    batches = []
+    batch = []
+    for idx in order:
+        padded = min(lengths[idx], max_len)
+        if batch and ((len(batch) + 1) * padded > token_budget or len(batch) >= max_batch_size):
+            batches.append(batch)
+            batch = []
+        batch.append(idx)
+    if batch:
+        batches.append(batch)
+    return batches
+
+def encode_sorted(model, texts, token_budget=8192, max_seq_length=None, max_batch_size=128):
+    """Encode texts in token-budgeted, length-sorted batches and return them in input order.
+
+    Texts longer than the model limit are truncated at max_seq_length tokens,
+    the same cut SentenceTransformer applies. Returns (embeddings, stats).
+    """
+    t0 = time.time()
+    texts = list(texts)
+    if not texts:
+        return torch.empty((0, model.get_sentence_embedding_dimension())), {}
+
+    if max_seq_length:
+        model.max_seq_length = max_seq_length
+    lengths, max_len = token_lengths(model, texts, max_seq_length)
+    batches = make_batches(lengths, max_len, token_budget, max_batch_size)
+
+    embeddings = None
+    padded_tokens = 0
+    for batch in batches:
+        batch_embeddings = model.encode([texts[i] for i in batch], batch_size=len(batch),
+                                        convert_to_tensor=True, show_progress_bar=False)
+        if embeddings is None:
+            embeddings = batch_embeddings.new_empty((len(texts), batch_embeddings.shape[1]))
+        embeddings[batch] = batch_embeddings
+        padded_tokens += len(batch) * max(min(lengths[i], max_len) for i in batch)
+
+    elapsed = time.time() - t0
+    tokens = sum(min(n, max_len) for n in lengths)
+    stats = {
+        "texts": len(texts),
+        "batches": len(batches),
+        "tokens": tokens,
+        "padded_tokens": padded_tokens,
+        "truncated": sum(1 for n in lengths if n > max_len),
+        "seconds": round(elapsed, 3),
+        "tokens_per_sec": round(tokens / elapsed, 1) if elapsed > 0 else 0.0
+    }
+    return embeddings, stats
+
+# ------------------------ Passage Windowing ------------------------
+def split_passages(sentences, sentence_lengths, max_tokens, overlap=1) -> list:
+    # Greedy sentence windows under max_tokens, each window repeating the last `overlap` sentences
+    windows = []
+    start = 0
+    while start < len(sentences):
+        end = start
+        total = 0
+        while end < len(sentences) and (end == start or total + sentence_lengths[end] <= max_tokens):
+            total += sentence_lengths[end]
+            end += 1
+        windows.append(" ".join(sentences[start:end]))
+        if end >= len(sentences):
+            break
+        start = max(end - overlap, start + 1)
+    return windows
+
+def build_passages(model, chunks, overlap=1):
+    """Split each chunk into sentence windows that fit the model's token limit.
+
+    Returns (passages, owners) where owners[p] is the index of the chunk that
+    passage p came from. Chunks without sentences stay a single passage.
+    """
+    max_tokens = model.max_seq_length - 2  # room for [CLS]/[SEP]
+    all_sentences = [s for chunk in chunks for s in (chunk.get("sentences") or [])]
+    lengths = iter([len(ids) for ids in model.tokenizer(all_sentences, add_special_tokens=False)["input_ids"]]
+                   if all_sentences else [])
+
+    passages = []
+    owners = []
+    for i, chunk in enumerate(chunks):
+        sentences = chunk.get("sentences") or []
+        sentence_lengths = [next(lengths) for _ in sentences]
+        if not sentences or sum(sentence_lengths) <= max_tokens:
+            passages.append(chunk["text"])
+            owners.append(i)
+            continue
+        for window in split_passages(sentences, sentence_lengths, max_tokens, overlap):
+            passages.append(window)
+            owners.append(i)
+    return passages, owners
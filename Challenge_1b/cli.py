@@ -0,0 +1,68 @@
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+# The shared pdf_pipeline package sits next to this script in Docker and at the repo root in a checkout
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+# ------------------------ Outline Mode (Challenge 1A) ------------------------
+def outline_command(args):
+    # Only PyMuPDF is needed here; spaCy and YAKE load on first use, so --no-nlp never imports them
+    from pdf_pipeline import extract_document_outline, iter_pdf_sources, decode_options, require_keyword_backend
+
+    require_keyword_backend(args.keywords)
+    args.output_dir.mkdir(parents=True, exist_ok=True)
+    decode = decode_options(args.decode, args.clip_margins)
+    for name, source in (entry for path in args.inputs for entry in iter_pdf_sources(path)):
+        start_time = time.time()
+        extracted_data = extract_document_outline(source, with_nlp=not args.no_nlp, workers=args.page_workers,
+                                                  name=name, toc_first=args.toc_first,
+                                                  strip_boilerplate=args.strip_boilerplate, decode=decode,
+                                                  keywords=args.keywords)
+        output_file = args.output_dir / f"{Path(name).stem}.json"
+        with open(output_file, "w", encoding="utf-8") as f:
+            json.dump(extracted_data, f, indent=2)
+        print(f"✅ Done: {output_file.name} (Processed in {time.time() - start_time:.2f} seconds)")
+
+# ------------------------ Entry Point ------------------------
+def build_parser(mode=None):
+    parser = argparse.ArgumentParser(description="PDF outline extraction (1A) and persona-based matching (1B)")
+    modes = parser.add_subparsers(dest="mode", required=True)
+
+    outline = modes.add_parser("outline", help="Extract structured outlines from PDFs (Challenge 1A)")
+    outline.add_argument("inputs", nargs="+", type=Path, help="PDF files, directories of PDFs or zip/tar bundles")
+    outline.add_argument("-o", "--output-dir", type=Path, required=True)
+    outline.add_argument("--no-nlp", action="store_true",
+                         help="Headings and paragraphs only; skip YAKE keywords and spaCy annotation")
+    outline.add_argument("--page-workers", type=int, default=1,
+                         help="Processes splitting the pages of one long PDF (used from 25 pages per worker)")
+    outline.add_argument("--toc-first", action="store_true",
+                         help="Take headings from the PDF bookmarks when they look complete")
+    outline.add_argument("--strip-boilerplate", action="store_true",
+                         help="Remove running headers/footers (lines repeated in the page margins)")
+    # Mirrors pdf_pipeline.DECODE_PROFILES without importing PyMuPDF for --help
+    outline.add_argument("--decode", choices=("default", "text", "text-fast"), default="default",
+                         help="text = no image blocks; text-fast = also expand ligatures and normalize whitespace")
+    outline.add_argument("--keywords", choices=("yake", "tfidf"), default="yake",
+                         help="yake = per section; tfidf = one TF-IDF model over each document's sections")
+    outline.add_argument("--clip-margins", type=float, nargs=4, metavar=("LEFT", "TOP", "RIGHT", "BOTTOM"),
+                         help="Ignore page margins of this many points when decoding text")
+    outline.set_defaults(handler=outline_command)
+
+    match = modes.add_parser("match", help="Rank and summarize sections for a task (Challenge 1B)")
+    if mode == "match":
+        # The matcher's options are only built (and its module imported) when that mode is selected
+        import semantic_matcher
+        semantic_matcher.build_parser(match)
+        match.set_defaults(handler=semantic_matcher.main)
+    return parser
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    args = build_parser(argv[0] if argv else None).parse_args(argv)
+    args.handler(args)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+import re
+import zlib
+from collections import defaultdict
+
+import numpy as np
+
+MERSENNE_PRIME = (1 << 31) - 1
+
+# ------------------------ Shingling ------------------------
+def shingles(text: str, size: int = 3) -> set:
+    words = re.findall(r"[a-z0-9]+", text.lower())
+    if len(words) <= size:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+# ------------------------ MinHash ------------------------
+class MinHasher:
+    def __init__(self, num_perm: int = 64, seed: int = 1):
+        # crc32 keeps shingle hashes stable across processes, unlike hash()
+        rng = np.random.RandomState(seed)
+        self.a = rng.randint(1, MERSENNE_PRIME, size=num_perm).astype(np.uint64)
+        self.b = rng.randint(0, MERSENNE_PRIME, size=num_perm).astype(np.uint64)
+
+    def signature(self, shingle_set):
+        if not shingle_set:
+            return None
+        x = np.fromiter((zlib.crc32(s.encode("utf-8")) for s in shingle_set), dtype=np.uint64,
+                        count=len(shingle_set))
+        return ((np.outer(self.a, x) + self.b[:, None]) % MERSENNE_PRIME).min(axis=1)
+
+# ------------------------ LSH Grouping ------------------------
+def near_duplicate_groups(texts, threshold: float = 0.8, num_perm: int = 64, bands: int = 16,
+                          shingle_size: int = 3) -> list:
+    """Group near-identical texts; returns lists of indices, each sorted, the first being the representative.
+
+    LSH banding only proposes candidate pairs; a pair is merged when the
+    fraction of agreeing MinHash values (estimated Jaccard similarity of the
+    word shingles) reaches threshold.
+    """
+    rows = num_perm // bands
+    hasher = MinHasher(num_perm)
+    signatures = [hasher.signature(shingles(text, shingle_size)) for text in texts]
+
+    parent = list(range(len(signatures)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for band in range(bands):
+        buckets = defaultdict(list)
+        for i, signature in enumerate(signatures):
+            if signature is not None:
+                buckets[signature[band * rows:(band + 1) * rows].tobytes()].append(i)
+        for members in buckets.values():
+            for pos, j in enumerate(members[1:], 1):
+                for i in members[:pos]:
+                    root_i, root_j = find(i), find(j)
+                    if root_i != root_j and np.mean(signatures[i] == signatures[j]) >= threshold:
+                        # The smallest index stays the root, so groups keep their earliest member first
+                        parent[max(root_i, root_j)] = min(root_i, root_j)
+
+    groups = defaultdict(list)
+    for i in range(len(signatures)):
+        groups[find(i)].append(i)
+    return sorted(groups.values(), key=lambda group: group[0])
@@ -0,0 +1,103 @@
+import torch
+
+PRECISIONS = ("float32", "float16", "int8")
+
+# ------------------------ Quantized Embedding Store ------------------------
+class EmbeddingStore:
+    """Row-normalized section embeddings kept as float32, float16 or int8 (with per-row scales)."""
+
+    def __init__(self, embeddings, precision: str = "float32", block_size: int = 4096, key: str = None):
+        if precision not in PRECISIONS:
+            raise ValueError(f"Unknown precision: {precision}")
+        self.precision = precision
+        self.block_size = block_size
+        self.key = key  # identifies the encoded texts, so a saved store is only reused for the same input
+
+        vectors = torch.as_tensor(embeddings, dtype=torch.float32)
+        vectors = torch.nn.functional.normalize(vectors, p=2, dim=1)
+
+        self.scales = None
+        if precision == "float32":
+            self.data = vectors
+        elif precision == "float16":
+            self.data = vectors.half()
+        else:
+            # One float32 scale per row: max |value| / 127
+            scales = vectors.abs().amax(dim=1).clamp(min=1e-12) / 127.0
+            self.data = torch.round(vectors / scales[:, None]).clamp(-127, 127).to(torch.int8)
+            self.scales = scales
+
+    def __len__(self):
+        return self.data.shape[0]
+
+    @property
+    def nbytes(self) -> int:
+        size = self.data.element_size() * self.data.nelement()
+        if self.scales is not None:
+            size += self.scales.element_size() * self.scales.nelement()
+        return size
+
+    def rows(self, indices) -> torch.Tensor:
+        """Dequantized float32 copies of the given rows (MMR and other per-candidate math)."""
+        indices = torch.as_tensor(list(indices), dtype=torch.long)
+        rows = self.data[indices].float()
+        if self.scales is not None:
+            rows *= self.scales[indices, None]
+        return rows
+
+    def scores(self, query_embeddings) -> torch.Tensor:
+        queries = torch.as_tensor(query_embeddings, dtype=torch.float32)
+        if queries.dim() == 1:
+            queries = queries.unsqueeze(0)
+        queries = torch.nn.functional.normalize(queries, p=2, dim=1)
+
+        # Score block by block so the full float32 matrix is never materialized
+        blocks = []
+        for start in range(0, len(self), self.block_size):
+            block = self.data[start:start + self.block_size].float()
+            block_scores = queries @ block.T
+            if self.scales is not None:
+                # q . (s * c) == s * (q . c): apply the per-row scale after the dot product
+                block_scores *= self.scales[start:start + self.block_size]
+            blocks.append(block_scores)
+        if not blocks:
+            return queries.new_zeros((queries.shape[0], 0))
+        return torch.cat(blocks, dim=1)
+
+    def save(self, path):
+        torch.save({"precision": self.precision, "data": self.data, "scales": self.scales, "key": self.key}, path)
+
+    @classmethod
+    def load(cls, path, block_size: int = 4096):
+        state = torch.load(path)
+        store = cls.__new__(cls)
+        store.precision = state["precision"]
+        store.block_size = block_size
+        store.data = state["data"]
+        store.scales = state["scales"]
+        store.key = state.get("key")
+        return store
+
+# ------------------------ Parity Report ------------------------
+def parity_report(query_embeddings, embeddings, top_k: int = 10, precisions=("float16", "int8")) -> dict:
+    reference = EmbeddingStore(embeddings, "float32")
+    ref_scores = reference.scores(query_embeddings)
+    k = min(top_k, len(reference))
+    ref_top = torch.topk(ref_scores, k=k, dim=1).indices.tolist()
+
+    report = {"float32": {"bytes": reference.nbytes}}
+    for precision in precisions:
+        store = EmbeddingStore(embeddings, precision)
+        scores = store.scores(query_embeddings)
+        top = torch.topk(scores, k=k, dim=1).indices.tolist()
+
+        overlaps = [len(set(a) & set(b)) / k for a, b in zip(ref_top, top)] if k else []
+        exact = [a == b for a, b in zip(ref_top, top)]
+        report[precision] = {
+            "bytes": store.nbytes,
+            "compression": round(reference.nbytes / max(store.nbytes, 1), 2),
+            f"overlap@{k}": round(sum(overlaps) / len(overlaps), 4) if overlaps else 1.0,
+            "exact_order_rate": round(sum(exact) / len(exact), 4) if exact else 1.0,
+            "max_abs_score_error": float((scores - ref_scores).abs().max()) if scores.numel() else 0.0
+        }
+    return report
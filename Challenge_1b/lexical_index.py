@@ -0,0 +1,102 @@
+import math
+import re
+from collections import Counter, defaultdict
+
+from pdf_pipeline.nlp_utils import clean_text, analyze_text
+
+# ------------------------ Term Extraction ------------------------
+def normalize_terms(words):
+    terms = []
+    for word in words:
+        for term in re.findall(r"[a-z0-9]+", word.lower()):
+            if len(term) > 1:
+                terms.append(term)
+    return terms
+
+def chunk_terms(chunk) -> list:
+    # Lemmas from spaCy (with their real frequencies) + every word of the YAKE keyphrases, with keywords boosted
+    semantic = chunk.get("semantic", {}) or {}
+    lemma_counts = semantic.get("lemma_counts")
+    if lemma_counts:
+        terms = [term for lemma, count in lemma_counts.items() for term in normalize_terms([lemma]) * count]
+    else:
+        # Outline JSONs written before lemma_counts existed only have the deduplicated lemmas
+        terms = normalize_terms(semantic.get("lemmas", []))
+    keyword_terms = normalize_terms(chunk.get("keywords", []))
+    heading_terms = normalize_terms([chunk.get("heading", "")])
+    return terms + keyword_terms * 2 + heading_terms
+
+def query_terms(text: str) -> list:
+    semantic = analyze_text(clean_text(text))
+    return list(dict.fromkeys(normalize_terms(semantic["lemmas"]) + normalize_terms(semantic["tokens"])))
+
+# ------------------------ BM25 Inverted Index ------------------------
+class BM25Index:
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.postings = defaultdict(list)  # term -> [(doc_id, tf)]
+        self.doc_lengths = []
+
+    @classmethod
+    def from_chunks(cls, chunks, **kwargs):
+        index = cls(**kwargs)
+        for chunk in chunks:
+            index.add(chunk_terms(chunk))
+        return index
+
+    def add(self, terms):
+        doc_id = len(self.doc_lengths)
+        for term, tf in Counter(terms).items():
+            self.postings[term].append((doc_id, tf))
+        self.doc_lengths.append(len(terms))
+        return doc_id
+
+    def __len__(self):
+        return len(self.doc_lengths)
+
+    def idf(self, term):
+        n = len(self.postings.get(term, ()))
+        return math.log(1 + (len(self) - n + 0.5) / (n + 0.5))
+
+    def score(self, terms) -> dict:
+        if not self.doc_lengths:
+            return {}
+        avg_len = sum(self.doc_lengths) / len(self.doc_lengths) or 1.0
+        scores = defaultdict(float)
+        for term in set(terms):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = self.idf(term)
+            for doc_id, tf in postings:
+                norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[doc_id] / avg_len)
+                scores[doc_id] += idf * tf * (self.k1 + 1) / (tf + norm)
+        return dict(scores)
+
+    def top_n(self, terms, n: int) -> list:
+        scores = self.score(terms)
+        return sorted(scores, key=lambda d: (-scores[d], d))[:n]
+
+# ------------------------ Score Fusion ------------------------
+def fuse_scores(dense: dict, lexical: dict, fusion: str = "rrf", alpha: float = 0.5, rrf_k: int = 60) -> dict:
+    """Combine dense and BM25 scores for the same candidate ids.
+
+    fusion="rrf" uses reciprocal rank fusion; fusion="linear" mixes cosine
+    similarity with max-normalized BM25 as alpha * dense + (1 - alpha) * lexical.
+    """
+    if fusion == "rrf":
+        dense_rank = {d: r for r, d in enumerate(sorted(dense, key=lambda d: -dense[d]), 1)}
+        lexical_rank = {d: r for r, d in enumerate(sorted(lexical, key=lambda d: -lexical[d]), 1)}
+        fused = {}
+        for d in dense:
+            fused[d] = 1.0 / (rrf_k + dense_rank[d])
+            if d in lexical_rank:
+                fused[d] += 1.0 / (rrf_k + lexical_rank[d])
+        return fused
+
+    if fusion == "linear":
+        max_lex = max(lexical.values(), default=0.0) or 1.0
+        return {d: alpha * dense[d] + (1 - alpha) * lexical.get(d, 0.0) / max_lex for d in dense}
+
+    raise ValueError(f"Unknown fusion method: {fusion}")
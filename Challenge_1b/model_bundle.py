@@ -0,0 +1,57 @@
+import json
+import sys
+import time
+from pathlib import Path
+
+ENCODER_NAME = "paraphrase-MiniLM-L6-v2"
+SUMMARIZER_NAME = "google/flan-t5-small"
+SPACY_NAME = "en_core_web_sm"
+
+# Layout inside a bundle directory
+ENCODER_DIR = "minilm"
+SUMMARIZER_DIR = "flan-t5-small"
+SPACY_DIR = "spacy"
+
+# ------------------------ Build ------------------------
+def build_bundle(bundle_dir: Path) -> dict:
+    """Download all models once and save them as local directories (safetensors weights)."""
+    from sentence_transformers import SentenceTransformer
+    from transformers import T5Tokenizer, T5ForConditionalGeneration
+    import spacy
+
+    bundle_dir = Path(bundle_dir)
+    bundle_dir.mkdir(parents=True, exist_ok=True)
+
+    SentenceTransformer(ENCODER_NAME, device="cpu").save(str(bundle_dir / ENCODER_DIR), safe_serialization=True)
+    T5Tokenizer.from_pretrained(SUMMARIZER_NAME).save_pretrained(bundle_dir / SUMMARIZER_DIR)
+    T5ForConditionalGeneration.from_pretrained(SUMMARIZER_NAME).save_pretrained(
+        bundle_dir / SUMMARIZER_DIR, safe_serialization=True)
+    spacy.load(SPACY_NAME).to_disk(bundle_dir / SPACY_DIR)
+
+    manifest = {
+        "encoder": {"name": ENCODER_NAME, "path": ENCODER_DIR},
+        "summarizer": {"name": SUMMARIZER_NAME, "path": SUMMARIZER_DIR},
+        "spacy": {"name": SPACY_NAME, "path": SPACY_DIR},
+        "built_at": time.strftime("%Y-%m-%dT%H:%M:%S")
+    }
+    with open(bundle_dir / "manifest.json", "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+# ------------------------ Resolve ------------------------
+def bundle_path(bundle_dir: Path, component: str) -> Path:
+    bundle_dir = Path(bundle_dir)
+    manifest_path = bundle_dir / "manifest.json"
+    if not manifest_path.exists():
+        raise FileNotFoundError(f"No model bundle at {bundle_dir} (run: python model_bundle.py {bundle_dir})")
+    with open(manifest_path, "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    return bundle_dir / manifest[component]["path"]
+
+# ------------------------ Entry Point ------------------------
+if __name__ == "__main__":
+    target = Path(sys.argv[1]) if len(sys.argv) > 1 else Path("/app/models")
+    t0 = time.time()
+    print(f"📦 Building model bundle in {target}...")
+    build_bundle(target)
+    print(f"✅ Model bundle ready in {time.time() - t0:.2f} sec")
@@ -0,0 +1,134 @@
+import time
+from pathlib import Path
+
+import torch
+
+from summarizers import T5Summarizer
+
+# Optional dependency: pip install "optimum[onnxruntime]"
+try:
+    from optimum.onnxruntime import (ORTModelForFeatureExtraction, ORTModelForSeq2SeqLM,
+                                     ORTQuantizer)
+    from optimum.onnxruntime.configuration import AutoQuantizationConfig
+except ImportError:
+    ORTModelForFeatureExtraction = ORTModelForSeq2SeqLM = ORTQuantizer = AutoQuantizationConfig = None
+
+ENCODER_NAME = "sentence-transformers/paraphrase-MiniLM-L6-v2"
+SUMMARIZER_NAME = "google/flan-t5-small"
+
+def require_onnxruntime():
+    if ORTModelForFeatureExtraction is None:
+        raise ImportError("The ONNX backend needs optimum with onnxruntime: pip install \"optimum[onnxruntime]\"")
+
+# ------------------------ Export + Dynamic int8 Quantization ------------------------
+def quantize_dir(model_dir: Path, file_names) -> None:
+    qconfig = AutoQuantizationConfig.avx2(is_static=False, per_channel=False)
+    for file_name in file_names:
+        quantizer = ORTQuantizer.from_pretrained(model_dir, file_name=file_name)
+        quantizer.quantize(save_dir=model_dir, quantization_config=qconfig)
+
+def export_models(onnx_dir: Path, quantize: bool = True, bundle_dir: Path = None) -> None:
+    """Export both models to ONNX; with bundle_dir they are read from the local bundle, not the hub."""
+    require_onnxruntime()
+    from transformers import AutoTokenizer
+
+    encoder, summarizer = ENCODER_NAME, SUMMARIZER_NAME
+    if bundle_dir:
+        from model_bundle import bundle_path
+        encoder, summarizer = str(bundle_path(bundle_dir, "encoder")), str(bundle_path(bundle_dir, "summarizer"))
+
+    onnx_dir = Path(onnx_dir)
+    for name, model_cls, subdir in ((encoder, ORTModelForFeatureExtraction, "minilm"),
+                                    (summarizer, ORTModelForSeq2SeqLM, "flan-t5-small")):
+        t0 = time.time()
+        target = onnx_dir / subdir
+        model_cls.from_pretrained(name, export=True).save_pretrained(target)
+        AutoTokenizer.from_pretrained(name).save_pretrained(target)
+        if quantize:
+            # Writes <name>_quantized.onnx next to each exported graph
+            quantize_dir(target, sorted(p.name for p in target.glob("*.onnx") if "_quantized" not in p.name))
+        print(f"📦 Exported {name} to {target} in {time.time() - t0:.2f} sec")
+
+def onnx_file(model_dir: Path, base: str, quantized: bool) -> str:
+    name = f"{base}_quantized.onnx" if quantized else f"{base}.onnx"
+    return name if (Path(model_dir) / name).exists() else f"{base}.onnx"
+
+# ------------------------ MiniLM Encoder ------------------------
+class OnnxSentenceEncoder:
+    """Drop-in for the parts of SentenceTransformer the matcher uses (mean pooling, no normalization)."""
+
+    def __init__(self, model_dir: Path, quantized: bool = True, max_seq_length: int = 128):
+        require_onnxruntime()
+        from transformers import AutoTokenizer
+
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir)
+        self.model = ORTModelForFeatureExtraction.from_pretrained(
+            model_dir, file_name=onnx_file(model_dir, "model", quantized))
+        self.max_seq_length = max_seq_length
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.model.config.hidden_size
+
+    def encode(self, sentences, batch_size: int = 32, convert_to_tensor: bool = False, show_progress_bar=None):
+        single = isinstance(sentences, str)
+        sentences = [sentences] if single else list(sentences)
+
+        batches = []
+        for start in range(0, len(sentences), batch_size):
+            inputs = self.tokenizer(sentences[start:start + batch_size], padding=True, truncation=True,
+                                    max_length=self.max_seq_length, return_tensors="pt")
+            hidden = self.model(**inputs).last_hidden_state
+            mask = inputs["attention_mask"].unsqueeze(-1).to(hidden.dtype)
+            batches.append((hidden * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1e-9))
+        embeddings = torch.cat(batches) if batches else torch.empty((0, self.get_sentence_embedding_dimension()))
+
+        if single:
+            embeddings = embeddings[0]
+        return embeddings if convert_to_tensor else embeddings.numpy()
+
+# ------------------------ Flan-T5 Summarizer ------------------------
+class OnnxT5Summarizer(T5Summarizer):
+    name = "t5-onnx"
+
+    def __init__(self, model_dir: Path, quantized: bool = True, **kwargs):
+        require_onnxruntime()
+        self.quantized = quantized
+        super().__init__(model_name=str(model_dir), **kwargs)
+
+    def load_model(self, model_name: str):
+        from transformers import AutoTokenizer
+
+        model = ORTModelForSeq2SeqLM.from_pretrained(
+            model_name,
+            encoder_file_name=onnx_file(model_name, "encoder_model", self.quantized),
+            decoder_file_name=onnx_file(model_name, "decoder_model", self.quantized),
+            decoder_with_past_file_name=onnx_file(model_name, "decoder_with_past_model", self.quantized))
+        return AutoTokenizer.from_pretrained(model_name), model
+
+# ------------------------ Parity Check ------------------------
+def backend_parity(queries, texts, torch_encoder, onnx_encoder, torch_summarizer=None, onnx_summarizer=None,
+                   top_k: int = 10, summary_samples: int = 5) -> dict:
+    def scores(encoder):
+        q = torch.nn.functional.normalize(encoder.encode(list(queries), convert_to_tensor=True).float(), dim=1)
+        t = torch.nn.functional.normalize(encoder.encode(list(texts), convert_to_tensor=True).float(), dim=1)
+        return q @ t.T
+
+    report = {}
+    t0 = time.time()
+    ref = scores(torch_encoder)
+    report["torch_encode_sec"] = round(time.time() - t0, 3)
+    t0 = time.time()
+    alt = scores(onnx_encoder)
+    report["onnx_encode_sec"] = round(time.time() - t0, 3)
+
+    k = min(top_k, len(texts))
+    ref_top = torch.topk(ref, k=k, dim=1).indices.tolist()
+    alt_top = torch.topk(alt, k=k, dim=1).indices.tolist()
+    report["max_abs_score_error"] = float((ref - alt).abs().max())
+    report[f"overlap@{k}"] = round(sum(len(set(a) & set(b)) / k for a, b in zip(ref_top, alt_top)) / len(ref_top), 4)
+
+    if torch_summarizer is not None and onnx_summarizer is not None:
+        samples = list(texts)[:summary_samples]
+        matches = [torch_summarizer.summarize(t, {}) == onnx_summarizer.summarize(t, {}) for t in samples]
+        report["summary_exact_match_rate"] = round(sum(matches) / len(matches), 4) if matches else 1.0
+    return report
@@ -1,27 +1,91 @@
+import argparse
+import fnmatch
 import json
+import sys
 import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from datetime import datetime
-from sentence_transformers import SentenceTransformer, util
-import torch
 
-from transformers import T5Tokenizer, T5ForConditionalGeneration
-from pdf_processor_pipeline import extract_document_outline
+# The shared pdf_pipeline package sits next to this script in Docker and at the repo root in a checkout
+sys.path.append(str(Path(__file__).resolve().parent.parent))
 
-# ------------------------ Hardcoded Paths ------------------------
+# torch, sentence-transformers and transformers (and the modules built on them) are
+# imported inside the functions that use them, so --help and light modes start fast
+from pdf_pipeline import (extract_document_outline, load_spacy, DECODE_PROFILES, decode_options,
+                          extract_keywords_tfidf, require_keyword_backend, document_profiler)
+from pdf_pipeline.metrics import METRICS, record_document
+from lexical_index import BM25Index, query_terms, fuse_scores
+from summary_cache import SummaryCache
+from model_bundle import bundle_path
+
+# ------------------------ Default Paths ------------------------
 BASE_DIR = Path("/app")  # inside Docker
 COLLECTIONS_DIR = BASE_DIR / "collections"
 OUTPUT_DIR = BASE_DIR / "outputs"
+ONNX_DIR = BASE_DIR / "onnx_models"
+
+ENCODER_MODEL = "paraphrase-MiniLM-L6-v2"
+SUMMARIZER_MODEL = "google/flan-t5-small"
+
+
+def list_collections(collections_dir: Path = COLLECTIONS_DIR, patterns=None):
+    # patterns are collection names or globs, e.g. "Collection 1" or "Collection *"
+    collections = sorted([p for p in collections_dir.iterdir() if p.is_dir()])
+    if patterns:
+        collections = [c for c in collections if any(fnmatch.fnmatch(c.name, pat) for pat in patterns)]
+    return collections
+
+# ------------------------ Model Loading ------------------------
+def load_t5(cache=None, mode="quality", backend="torch", onnx_dir=ONNX_DIR, bundle_dir=None,
+            model_name=SUMMARIZER_MODEL):
+    from summarizers import T5Summarizer
+
+    if backend == "onnx":
+        from onnx_backend import OnnxT5Summarizer
+        return OnnxT5Summarizer(Path(onnx_dir) / "flan-t5-small", cache=cache, mode=mode)
+    if bundle_dir:
+        return T5Summarizer(model_name=str(bundle_path(bundle_dir, "summarizer")), cache=cache, mode=mode)
+    return T5Summarizer(model_name=model_name, cache=cache, mode=mode)
+
 
-OUTPUT_DIR.mkdir(exist_ok=True)
-COLLECTIONS = sorted([p for p in COLLECTIONS_DIR.iterdir() if p.is_dir()])
+def load_encoder(backend="torch", onnx_dir=ONNX_DIR, bundle_dir=None, model_name=ENCODER_MODEL):
+    t1 = time.time()
+    if backend == "onnx":
+        from onnx_backend import OnnxSentenceEncoder
+        model = OnnxSentenceEncoder(Path(onnx_dir) / "minilm")
+    elif bundle_dir:
+        from sentence_transformers import SentenceTransformer
+        model = SentenceTransformer(str(bundle_path(bundle_dir, "encoder")), device="cpu")
+    else:
+        from sentence_transformers import SentenceTransformer
+        model = SentenceTransformer(model_name)
+    print(f"📦 Sentence encoder ({backend}) loaded in {time.time() - t1:.2f} sec")
+    return model
 
-# ------------------------ Load Summarizer ------------------------
-print("🧠 Loading Flan-T5-small summarizer...")
-tsum = time.time()
-tokenizer = T5Tokenizer.from_pretrained("google/flan-t5-small")
-summarizer = T5ForConditionalGeneration.from_pretrained("google/flan-t5-small")
-print(f"✅ Summarizer loaded in {time.time() - tsum:.2f} sec")
+
+def load_extractive(model, **kw):
+    from summarizers import ExtractiveSummarizer
+    return ExtractiveSummarizer(model)
+
+
+SUMMARIZERS = {
+    "t5": lambda model, **kw: load_t5(mode="quality", **kw),
+    "t5-fast": lambda model, **kw: load_t5(mode="fast", **kw),
+    "extractive": load_extractive,
+}
+
+
+def get_summarizer(summarizer, model, **kw):
+    # Accepts a Summarizer instance or the name of a registered one
+    from summarizers import Summarizer
+
+    if isinstance(summarizer, Summarizer):
+        return summarizer
+    if summarizer not in SUMMARIZERS:
+        raise ValueError(f"Unknown summarizer: {summarizer}")
+    return SUMMARIZERS[summarizer](model, **kw)
 
 # ------------------------ Core Functions ------------------------
 
@@ -57,55 +121,151 @@ def collect_chunks(pdf_data, file_name):
             "heading": heading,
             "text": text,
             "keywords": section.get("keywords", []),
+            "sentences": section.get("sentences", []),
             "semantic": section.get("semantic", {})
         })
 
     return chunks
 
-def generate_summary(text: str, semantic: dict, max_tokens: int = 128) -> str:
-    def join_and_limit(lst, max_len=20):
-        return " ".join(lst[:max_len]) if isinstance(lst, list) else ""
+def encode_chunks(model, texts, token_budget=8192):
+    from batch_encoder import encode_sorted
 
-    tokens = join_and_limit(semantic.get("tokens", []))
-    nouns = join_and_limit(semantic.get("nouns", []))
-    verbs = join_and_limit(semantic.get("verbs", []))
-    lemmas = join_and_limit(semantic.get("lemmas", []))
+    embeddings, stats = encode_sorted(model, texts, token_budget=token_budget)
+    if stats:
+        print(f"⚡ Encoded {stats['texts']} sections in {stats['batches']} batches "
+              f"({stats['tokens_per_sec']} tokens/sec, {stats['truncated']} truncated)")
+    return embeddings
 
-    prompt = (
-        f"Summarize for a business user:\n"
-        f"Text: {text}\n"
-        f"Important Tokens: {tokens}\n"
-        f"Nouns: {nouns}\n"
-        f"Verbs: {verbs}\n"
-        f"Lemmas: {lemmas}"
-    )
 
-    input_ids = tokenizer(prompt, return_tensors="pt", truncation=True).input_ids
-    output_ids = summarizer.generate(input_ids, max_length=max_tokens, num_beams=2, repetition_penalty=1.3)
-    return tokenizer.decode(output_ids[0], skip_special_tokens=True)
+def passage_texts(model, chunks, windowing=True, overlap=1):
+    # Long sections become several passages; owners maps each passage back to its chunk
+    from batch_encoder import build_passages
 
+    if windowing:
+        passages, owners = build_passages(model, chunks, overlap=overlap)
+        if len(passages) > len(chunks):
+            print(f"🪟 Split {len(chunks)} sections into {len(passages)} passages")
+    else:
+        passages, owners = [chunk["text"] for chunk in chunks], list(range(len(chunks)))
+    return passages, owners
+
+
+def load_passage_store(model, passages, precision="float32", token_budget=8192, cache_path=None,
+                       encoder_id="", parity=None, query_embeddings=None, top_k=10):
+    """EmbeddingStore of the passages, reused from cache_path when it holds the same passages.
+
+    Only the store is kept: the float32 matrix is dropped once it is quantized.
+    A parity dict is filled from that same float32 matrix, so it is only
+    available when the passages are actually encoded.
+    """
+    from embedding_store import EmbeddingStore, parity_report
+
+    key = SummaryCache.make_key(encoder_id, precision, passages)
+    if cache_path and Path(cache_path).exists():
+        try:
+            store = EmbeddingStore.load(cache_path)
+            if store.key == key and parity is None:
+                print(f"🗃️  Reused {len(store)} passage embeddings from {cache_path}")
+                return store
+        except (OSError, RuntimeError, KeyError) as e:
+            print(f"⚠️ Ignoring unreadable embedding cache {cache_path}: {e}")
+
+    with METRICS.timer("embedding"):
+        passage_embeddings = encode_chunks(model, passages, token_budget)
+    METRICS.inc("embeddings", len(passages))
+    if parity is not None:
+        parity.update(parity_report(query_embeddings, passage_embeddings, top_k=top_k))
+    store = EmbeddingStore(passage_embeddings, precision, key=key)
+    del passage_embeddings
+    if cache_path:
+        Path(cache_path).parent.mkdir(parents=True, exist_ok=True)
+        store.save(cache_path)
+    return store
+
+
+def pool_section_scores(passage_scores, owners, n_sections):
+    # Max-pool passage scores back to their sections; unscored sections stay at -inf
+    import torch
+
+    index = torch.as_tensor(owners, dtype=torch.long).expand(passage_scores.shape[0], -1)
+    pooled = torch.full((passage_scores.shape[0], n_sections), float("-inf"))
+    return pooled.scatter_reduce(1, index, passage_scores.float(), reduce="amax")
+
+
+def rank_queries(scores, top_k=10):
+    import torch
+
+    k = min(top_k, scores.shape[1])
+    top_scores, top_indices = torch.topk(scores, k=k, dim=1)
+    return [list(zip(row_scores.tolist(), row_indices.tolist()))
+            for row_scores, row_indices in zip(top_scores, top_indices)]
+
+
+def best_passage_ids(passage_row, owners):
+    by_section = {}
+    for p, owner in enumerate(owners):
+        if owner not in by_section or passage_row[p] > passage_row[by_section[owner]]:
+            by_section[owner] = p
+    return by_section
 
-def find_matches(task: str, chunks, model, top_k=10):
-    print("🧠 Generating embeddings and running semantic similarity...")
-    t0 = time.time()
 
-    task_embedding = model.encode(task, convert_to_tensor=True)
-    texts = [chunk["text"] for chunk in chunks]
-    if not texts:
+def best_passages(ranked, passage_row, passages, owners):
+    # Highest-scoring passage of each selected section, used as the summary input
+    by_section = best_passage_ids(passage_row, owners)
+    return {idx: passages[by_section[idx]] for _, idx in ranked if idx in by_section}
+
+
+def mmr_select(ranked, embeddings, files, top_k=10, mmr_lambda=0.7, doc_cap=0):
+    """Greedy Maximal Marginal Relevance over (score, idx) candidates.
+
+    embeddings has one row per candidate. Scores are min-max scaled first so
+    fused (RRF) and cosine scores trade off against similarity the same way.
+    doc_cap > 0 limits how many selected sections may come from one file.
+    """
+    import torch
+
+    if not ranked:
         return []
+    scores = torch.tensor([score for score, _ in ranked], dtype=torch.float32)
+    span = float(scores.max() - scores.min())
+    relevance = (scores - scores.min()) / span if span > 0 else torch.ones_like(scores)
+    normalized = torch.nn.functional.normalize(embeddings.float(), dim=1)
+    similarity = normalized @ normalized.T
+
+    selected = []
+    per_doc = Counter()
+    redundancy = torch.zeros(len(ranked))
+    available = torch.ones(len(ranked), dtype=torch.bool)
+    while len(selected) < top_k:
+        mmr = mmr_lambda * relevance - (1 - mmr_lambda) * redundancy
+        mmr[~available] = float("-inf")
+        best = int(torch.argmax(mmr))
+        if not available[best]:
+            break
+        available[best] = False
+        if doc_cap and per_doc[files[best]] >= doc_cap:
+            continue
+        selected.append(best)
+        per_doc[files[best]] += 1
+        redundancy = torch.maximum(redundancy, similarity[best].clamp(min=0))
+    return [ranked[i] for i in selected]
 
-    text_embeddings = model.encode(texts, convert_to_tensor=True)
-    scores = util.cos_sim(task_embedding, text_embeddings)[0]
-    top_results = torch.topk(scores, k=min(top_k, len(chunks)))
 
+def build_matches(ranked, chunks, summarizer, best_passage=None, query_embedding=None, duplicates=None):
+    # duplicates maps a representative chunk index to the near-identical chunks folded into it
+    best_passage = best_passage or {}
+    duplicates = duplicates or {}
     results = []
-    for score, idx in zip(top_results[0], top_results[1]):
+    for score, idx in ranked:
         chunk = chunks[idx]
         semantic = chunk.get("semantic", {})
-        text = chunk["text"]
+        text = best_passage.get(idx, chunk["text"])
         if len(text) > 1500:
             text = text[:1500]
-        summary = generate_summary(chunk["text"], semantic)
+        with METRICS.timer("summary"):
+            summary = summarizer.summarize(text, semantic, sentences=chunk.get("sentences"),
+                                           query_embedding=query_embedding)
+        METRICS.inc("summaries")
 
         results.append({
             "pdf_name": chunk["file"],
@@ -116,22 +276,301 @@ def find_matches(task: str, chunks, model, top_k=10):
             "score": float(score),
             "semantic_summary": summary
         })
+        if duplicates.get(idx):
+            results[-1]["duplicates"] = [{"pdf_name": dup["file"], "page": dup["page"],
+                                          "section_heading": dup["heading"]} for dup in duplicates[idx]]
+    return results
+
 
+def rank_hybrid(scores, lexical_per_query, top_k=10, fusion="rrf", alpha=0.5):
+    # A query's own BM25 hits are its dense candidates; a query without any is ranked over every section
+    ranked_per_query = []
+    for dense_row, lexical in zip(scores.tolist(), lexical_per_query):
+        dense = {d: dense_row[d] for d in (lexical or range(len(dense_row)))}
+        fused = fuse_scores(dense, lexical, fusion=fusion, alpha=alpha)
+        top = sorted(fused, key=lambda d: (-fused[d], d))[:top_k]
+        ranked_per_query.append([(fused[d], d) for d in top])
+    return ranked_per_query
+
+
+def find_matches_batch(tasks, chunks, model, top_k=10, ranker="dense",
+                       candidates=100, fusion="rrf", alpha=0.5, precision="float32",
+                       token_budget=8192, windowing=True, overlap=1, summarizer="t5", dedup=0.0,
+                       mmr_lambda=None, doc_cap=0, embedding_cache=None, encoder_id="", parity=None):
+    """Rank chunks for every task and summarize the top_k of each.
+
+    embedding_cache is a file the passage EmbeddingStore is saved to and
+    reused from; a dict passed as parity receives the precision parity report
+    of the scored passage matrix.
+    """
+    print(f"🧠 Generating embeddings and running semantic similarity for {len(tasks)} queries...")
+    t0 = time.time()
+
+    if not chunks or not tasks:
+        return [[] for _ in tasks]
+
+    duplicates = None
+    if dedup:
+        # Rank, embed and summarize one representative per near-duplicate group, then fan out
+        from dedup import near_duplicate_groups
+        groups = near_duplicate_groups([chunk["text"] for chunk in chunks], threshold=dedup)
+        if len(groups) < len(chunks):
+            print(f"🧬 Folded {len(chunks) - len(groups)} near-duplicate sections into their representatives")
+        duplicates = {g: [chunks[i] for i in group[1:]] for g, group in enumerate(groups)}
+        chunks = [chunks[group[0]] for group in groups]
+
+    summarizer = get_summarizer(summarizer, model)
+    query_embeddings = model.encode(list(tasks), convert_to_tensor=True)
+
+    if ranker == "hybrid":
+        # Stage 1: BM25 over lemmas + keywords narrows what we embed
+        index = BM25Index.from_chunks(chunks)
+        lexical_per_query = []
+        for task in tasks:
+            bm25 = index.score(query_terms(task))
+            top_ids = sorted(bm25, key=lambda d: (-bm25[d], d))[:candidates]
+            lexical_per_query.append({d: bm25[d] for d in top_ids})
+        if all(lexical_per_query):
+            candidate_ids = sorted(set().union(*lexical_per_query))
+        else:
+            # A query with no BM25 hit falls back to dense over the whole corpus, not the other queries' hits
+            candidate_ids = list(range(len(chunks)))
+        print(f"🔎 BM25 kept {len(candidate_ids)} of {len(chunks)} sections for dense scoring")
+    elif ranker == "dense":
+        candidate_ids = list(range(len(chunks)))
+    else:
+        raise ValueError(f"Unknown ranker: {ranker}")
+
+    # Stage 2: dense scoring of every passage of the candidate sections in one matrix multiply
+    passages, owners = passage_texts(model, [chunks[i] for i in candidate_ids], windowing, overlap)
+    owners = [candidate_ids[o] for o in owners]
+    store = load_passage_store(model, passages, precision, token_budget, embedding_cache, encoder_id,
+                               parity, query_embeddings, top_k)
+    passage_scores = store.scores(query_embeddings)
+    scores = pool_section_scores(passage_scores, owners, len(chunks))
+
+    def rank(rows, lexical, k):
+        if ranker == "hybrid":
+            return rank_hybrid(rows, lexical, top_k=k, fusion=fusion, alpha=alpha)
+        return rank_queries(rows, k)
+
+    # Diversified selection re-ranks a wider pool, so redundant hits are dropped before summarization
+    diversify = mmr_lambda is not None or doc_cap
+    pool_k = top_k * 3 if diversify else top_k
+    ranked_per_query = rank(scores, lexical_per_query if ranker == "hybrid" else None, pool_k)
+
+    passage_rows = passage_scores.tolist()
+    if diversify:
+        for q, ranked in enumerate(ranked_per_query):
+            by_section = best_passage_ids(passage_rows[q], owners)
+            k = pool_k
+            while True:
+                pool = [(score, idx) for score, idx in ranked if idx in by_section]
+                picks = mmr_select(
+                    pool, store.rows(by_section[idx] for _, idx in pool),
+                    [chunks[idx]["file"] for _, idx in pool], top_k=top_k,
+                    mmr_lambda=1.0 if mmr_lambda is None else mmr_lambda, doc_cap=doc_cap)
+                # --doc-cap can reject most of the pool; widen it until top_k picks or no candidates are left
+                if len(picks) >= top_k or len(ranked) < k or k >= len(chunks):
+                    break
+                k *= 2
+                ranked = rank(scores[q:q + 1], lexical_per_query[q:q + 1] if ranker == "hybrid" else None, k)[0]
+            ranked_per_query[q] = picks
     print(f"✅ Embedding + similarity computation time: {time.time() - t0:.2f} sec")
+
+    t1 = time.time()
+    selected = sorted({idx for ranked in ranked_per_query for _, idx in ranked})
+    summarizer.prepare([chunks[idx].get("sentences") for idx in selected])
+    results = [build_matches(ranked, chunks, summarizer,
+                             best_passages(ranked, passage_rows[q], passages, owners),
+                             query_embedding=query_embeddings[q], duplicates=duplicates)
+               for q, ranked in enumerate(ranked_per_query)]
+    print(f"✅ {summarizer.name} summarization time: {time.time() - t1:.2f} sec")
     return results
 
+
+def find_matches(task: str, chunks, model, top_k=10, **options):
+    return find_matches_batch([task], chunks, model, top_k, **options)[0]
+
+
+def load_queries(queries_path: Path):
+    # Accepts a list of task strings or {"persona": ..., "task": ...} objects
+    queries = []
+    for item in load_input(queries_path):
+        if isinstance(item, str):
+            queries.append({"persona": "", "task": item})
+        else:
+            persona = item.get("persona", "")
+            if isinstance(persona, dict):
+                persona = persona.get("role", "")
+            queries.append({"persona": persona, "task": item["task"]})
+    return queries
+
+
+def format_output(pdf_files, persona, task, top_matches, profile="challenge"):
+    metadata = {
+        "input_documents": pdf_files,
+        "persona": persona,
+        "job_to_be_done": task,
+        "processing_timestamp": datetime.now().isoformat()
+    }
+
+    extracted_sections = []
+    subsection_analysis = []
+
+    for i, match in enumerate(top_matches, 1):
+        extracted_sections.append({
+            "document": match["pdf_name"].replace(".json", ".pdf"),
+            "section_title": match["section_heading"],
+            "importance_rank": i,
+            "page_number": match["page"]
+        })
+        if profile == "detailed":
+            extracted_sections[-1].update({
+                "score": match["score"],
+                "keywords": match["keywords"],
+                "matched_content": match["matched_content"]
+            })
+            if "duplicates" in match:
+                extracted_sections[-1]["duplicates"] = match["duplicates"]
+        subsection_analysis.append({
+            "document": match["pdf_name"].replace(".json", ".pdf"),
+            "refined_text": match["semantic_summary"],
+            "page_number": match["page"]
+        })
+
+    return {
+        "metadata": metadata,
+        "extracted_sections": extracted_sections,
+        "subsection_analysis": subsection_analysis
+    }
+
+# ------------------------ Outline Extraction ------------------------
+# Outline JSONs written before the options were recorded (e.g. the committed ones) used these
+DEFAULT_EXTRACTION = {"toc_first": False, "strip_boilerplate": False, "decode": None, "keywords": "yake"}
+
+def extraction_record(extract_options) -> dict:
+    # The options that change an outline JSON (page workers don't), in their JSON form
+    options = {k: v for k, v in (extract_options or {}).items() if k != "workers"}
+    return {**DEFAULT_EXTRACTION, **json.loads(json.dumps(options))}
+
+def outline_is_current(json_path: Path, pdf_path: Path, extract_options=None) -> bool:
+    # --skip-existing: newer than the PDF and extracted with the same options
+    if not json_path.exists() or json_path.stat().st_mtime < pdf_path.stat().st_mtime:
+        return False
+    try:
+        with open(json_path, "r", encoding="utf-8") as f:
+            recorded = json.load(f).get("extraction", {})
+    except (OSError, ValueError):
+        return False
+    return {**DEFAULT_EXTRACTION, **recorded} == extraction_record(extract_options)
+
+def extract_outline_file(pdf_path: Path, json_path: Path, extract_options=None, profiling=None):
+    t0 = time.time()
+    stats = {}
+    with document_profiler(pdf_path.name, **(profiling or {})):
+        outline_data = extract_document_outline(pdf_path, stats=stats, **(extract_options or {}))
+    outline_data["extraction"] = extraction_record(extract_options)
+    with open(json_path, "w", encoding="utf-8") as jf:
+        json.dump(outline_data, jf, indent=2)
+    return json_path, time.time() - t0, stats
+
+
+def extract_outlines(pdf_files, pdf_dir: Path, pdf_json_dir: Path, workers: int = 1, skip_existing: bool = False,
+                     extract_options=None, profiling=None):
+    # extract_options go to extract_document_outline (its workers= is per-PDF page parallelism)
+    jobs = []
+    for pdf_file in pdf_files:
+        pdf_path = pdf_dir / pdf_file
+        json_path = pdf_json_dir / pdf_file.replace(".pdf", ".json")
+
+        if not pdf_path.exists():
+            print(f"⚠️ Skipping missing PDF file: {pdf_file}")
+            continue
+        if skip_existing and outline_is_current(json_path, pdf_path, extract_options):
+            print(f"♻️  Reusing {json_path.name}")
+            continue
+        jobs.append((pdf_path, json_path, extract_options, profiling))
+
+    # queue_depth = PDFs of this collection not finished yet
+    METRICS.set_gauge("queue_depth", len(jobs))
+    if workers > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for done, (json_path, elapsed, stats) in enumerate(pool.map(extract_outline_file, *zip(*jobs)), 1):
+                record_document(stats, elapsed)
+                METRICS.set_gauge("queue_depth", len(jobs) - done)
+                print(f"📄 Processed {json_path.name}")
+        return
+
+    for done, (pdf_path, json_path, extract_options, profiling) in enumerate(jobs, 1):
+        print(f"📄 Processing {pdf_path.name}")
+        _, elapsed, stats = extract_outline_file(pdf_path, json_path, extract_options, profiling)
+        record_document(stats, elapsed)
+        METRICS.set_gauge("queue_depth", len(jobs) - done)
+
 # ------------------------ Main ------------------------
-def main():
+def main(args):
+    if args.export_onnx:
+        from onnx_backend import export_models
+        export_models(args.onnx_dir, quantize=not args.no_quantize, bundle_dir=args.model_bundle)
+        return
+
+    # Fail before any model loads rather than on the first collection
+    require_keyword_backend(args.keywords)
     t_start = time.time()
     print("🚀 Starting semantic matcher...")
-
-    for collection in COLLECTIONS:
+    if args.metrics_port:
+        METRICS.serve(args.metrics_port, args.metrics_host)
+    output_dir = args.output_dir
+    output_dir.mkdir(parents=True, exist_ok=True)
+    queries = load_queries(args.queries) if args.queries else None
+    top_k = args.top_k
+
+    summary_cache_path = args.summary_cache
+    if summary_cache_path is None and args.cache_dir:
+        summary_cache_path = args.cache_dir / "summary_cache.json"
+    summary_cache = SummaryCache(summary_cache_path, args.summary_cache_size) if summary_cache_path else None
+
+    # Models are shared by every collection, so load them once
+    bundle_dir = args.model_bundle
+    if bundle_dir:
+        t1 = time.time()
+        load_spacy(str(bundle_path(bundle_dir, "spacy")))
+        print(f"📦 spaCy loaded from bundle in {time.time() - t1:.2f} sec")
+    model = load_encoder(args.backend, args.onnx_dir, bundle_dir, model_name=args.encoder_model)
+    t1 = time.time()
+    summarizer = get_summarizer(args.summarizer, model, cache=summary_cache, backend=args.backend,
+                                onnx_dir=args.onnx_dir, bundle_dir=bundle_dir, model_name=args.summarizer_model)
+    print(f"📦 Summarizer ready in {time.time() - t1:.2f} sec")
+    if args.deadline:
+        from summarizers import DeadlineSummarizer
+        summarizer = DeadlineSummarizer(summarizer, load_extractive(model), args.deadline)
+    match_options = {"ranker": args.ranker, "candidates": args.candidates,
+                     "fusion": args.fusion, "alpha": args.alpha, "precision": args.precision,
+                     "token_budget": args.token_budget, "windowing": not args.no_windowing,
+                     "overlap": args.passage_overlap, "summarizer": summarizer, "dedup": args.dedup,
+                     "mmr_lambda": args.mmr_lambda, "doc_cap": args.doc_cap,
+                     "encoder_id": f"{args.backend}:{bundle_dir or args.encoder_model}"}
+    extract_options = {"workers": args.page_workers, "toc_first": args.toc_first,
+                       "strip_boilerplate": args.strip_boilerplate,
+                       "decode": decode_options(args.decode, args.clip_margins),
+                       # TF-IDF keywords are fitted per collection below, not per PDF
+                       "keywords": "none" if args.keywords == "tfidf" else "yake"}
+    profiling = {"artifact_dir": args.profile_dir, "docs": args.profile_docs, "threshold": args.profile_threshold}
+    backend_models = None
+
+    for collection in list_collections(args.collections_dir, args.collections):
+        if args.deadline:
+            summarizer.reset()
         input_path = collection / "challenge1b_input.json"
-        output_path = OUTPUT_DIR / f"{collection.name}_output.json"
-        pdf_json_dir = collection / "json_output"
+        output_path = output_dir / f"{collection.name}_output.json"
         pdf_dir = collection / "PDFs"
+        # With --cache-dir the per-PDF outline JSONs live outside the (possibly read-only) collection.
+        # Keyword-less outlines for --keywords tfidf get their own folder instead of replacing json_output
+        json_dir_name = "json_output_tfidf" if args.keywords == "tfidf" else "json_output"
+        pdf_json_dir = args.cache_dir / collection.name / json_dir_name if args.cache_dir else collection / json_dir_name
 
-        pdf_json_dir.mkdir(exist_ok=True)
+        pdf_json_dir.mkdir(parents=True, exist_ok=True)
 
         print(f"\n📂 Processing {collection.name}...")
 
@@ -146,26 +585,11 @@ def main():
         # Step 1: Extract outlines
         print("🛠️  Extracting document outlines from PDFs...")
         t0 = time.time()
-        for pdf_file in pdf_files:
-            pdf_path = pdf_dir / pdf_file
-            json_path = pdf_json_dir / pdf_file.replace(".pdf", ".json")
-
-            if not pdf_path.exists():
-                print(f"⚠️ Skipping missing PDF file: {pdf_file}")
-                continue
-
-            print(f"📄 Processing {pdf_file}")
-            outline_data = extract_document_outline(pdf_path)
-            with open(json_path, "w", encoding="utf-8") as jf:
-                json.dump(outline_data, jf, indent=2)
+        extract_outlines(pdf_files, pdf_dir, pdf_json_dir, workers=args.workers, skip_existing=args.skip_existing,
+                         extract_options=extract_options, profiling=profiling)
         print(f"✅ PDF processing complete in {time.time() - t0:.2f} sec")
 
-        # Step 2: Load SentenceTransformer
-        t1 = time.time()
-        model = SentenceTransformer("paraphrase-MiniLM-L6-v2")
-        print(f"📦 SentenceTransformer loaded in {time.time() - t1:.2f} sec")
-
-        # Step 3: Collect all chunks
+        # Step 2: Collect all chunks
         all_chunks = []
         t2 = time.time()
         for f in file_names:
@@ -174,51 +598,156 @@ def main():
             if data:
                 chunks = collect_chunks(data, f)
                 all_chunks.extend(chunks)
+        if args.keywords == "tfidf":
+            for chunk, keywords in zip(all_chunks, extract_keywords_tfidf(c["text"] for c in all_chunks)):
+                chunk["keywords"] = keywords
         print(f"✅ Total parsing time: {time.time() - t2:.2f} sec")
         print(f"🔍 Matching from {len(all_chunks)} extracted sections...")
 
-        # Step 4: Semantic Matching + Summarization
+        # Step 3: Semantic Matching + Summarization
         t3 = time.time()
-        top_matches = find_matches(task, all_chunks, model, top_k=10)
+        if queries:
+            tasks = [q["task"] for q in queries]
+            personas = [q["persona"] for q in queries]
+        else:
+            tasks = [task]
+            personas = [input_data.get("persona", {}).get("role", "Travel Planner")]
+        # The passage store is saved under --cache-dir and reused while the passages stay the same
+        embedding_cache = args.cache_dir / collection.name / f"embeddings_{args.precision}.pt" if args.cache_dir else None
+        parity = {} if args.parity_report else None
+        matches_per_task = find_matches_batch(tasks, all_chunks, model, top_k=top_k, embedding_cache=embedding_cache,
+                                              parity=parity, **match_options)
+        METRICS.inc("collections")
+        if args.metrics_file:
+            METRICS.write_prometheus(args.metrics_file)
         print(f"📝 Total match + summarization time: {time.time() - t3:.2f} sec")
 
-        # Step 5: Format output for Challenge 1B
+        if parity:
+            parity_path = output_dir / f"{collection.name}_parity.json"
+            with open(parity_path, "w", encoding="utf-8") as f:
+                json.dump(parity, f, indent=2)
+            print(f"📊 Embedding precision parity report saved to {parity_path}")
+
+        if args.backend_parity:
+            from onnx_backend import backend_parity
+            if backend_models is None:
+                backend_models = (load_encoder("torch", bundle_dir=bundle_dir), load_encoder("onnx", args.onnx_dir),
+                                  load_t5(backend="torch", bundle_dir=bundle_dir),
+                                  load_t5(backend="onnx", onnx_dir=args.onnx_dir))
+            report = backend_parity(tasks, [c["text"] for c in all_chunks], *backend_models, top_k=top_k)
+            parity_path = output_dir / f"{collection.name}_backend_parity.json"
+            with open(parity_path, "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=2)
+            print(f"📊 PyTorch vs ONNX parity report saved to {parity_path}")
+
+        # Step 4: Format output for Challenge 1B
         print("📦 Formatting output as per Challenge 1B schema...")
-        metadata = {
-            "input_documents": pdf_files,
-            "persona": "Travel Planner",
-            "job_to_be_done": task,
-            "processing_timestamp": datetime.now().isoformat()
-        }
-
-        extracted_sections = []
-        subsection_analysis = []
-
-        for i, match in enumerate(top_matches, 1):
-            extracted_sections.append({
-                "document": match["pdf_name"].replace(".json", ".pdf"),
-                "section_title": match["section_heading"],
-                "importance_rank": i,
-                "page_number": match["page"]
-            })
-            subsection_analysis.append({
-                "document": match["pdf_name"].replace(".json", ".pdf"),
-                "refined_text": match["semantic_summary"],
-                "page_number": match["page"]
-            })
+        for qi, (persona, query_task, top_matches) in enumerate(zip(personas, tasks, matches_per_task), 1):
+            final_output = format_output(pdf_files, persona, query_task, top_matches, profile=args.output_profile)
+            if queries:
+                output_path = output_dir / f"{collection.name}_query{qi}_output.json"
 
-        final_output = {
-            "metadata": metadata,
-            "extracted_sections": extracted_sections,
-            "subsection_analysis": subsection_analysis
-        }
+            with open(output_path, "w", encoding="utf-8") as f:
+                json.dump(final_output, f, indent=2)
 
-        with open(output_path, "w", encoding="utf-8") as f:
-            json.dump(final_output, f, indent=2)
+            print(f"✅ Final output saved to {output_path}")
 
-        print(f"✅ Final output saved to {output_path}")
+        if args.deadline and summarizer.fallbacks:
+            print(f"⏰ Deadline hit: {summarizer.fallbacks} summaries fell back to extractive text")
+        if summary_cache is not None:
+            summary_cache.save()
+            print(f"🗃️  Summary cache: {summary_cache.stats()}")
 
     print(f"⏱️  Total time: {time.time() - t_start:.2f} sec")
+    if args.metrics_file or args.metrics_port:
+        METRICS.print_summary()
+        METRICS.write_summary(output_dir / "metrics_summary.json")
+
+# ------------------------ CLI ------------------------
+def build_parser(parser=None):
+    parser = parser or argparse.ArgumentParser(description="Challenge 1B semantic matcher")
+    parser.add_argument("--collections-dir", type=Path, default=COLLECTIONS_DIR,
+                        help="Directory holding one sub-directory per collection")
+    parser.add_argument("--output-dir", type=Path, default=OUTPUT_DIR)
+    parser.add_argument("--collections", nargs="+", metavar="NAME",
+                        help="Only process these collections (names or globs)")
+    parser.add_argument("--workers", type=int, default=1, help="PDFs extracted in parallel per collection")
+    parser.add_argument("--page-workers", type=int, default=1,
+                        help="Processes splitting the pages of one long PDF (used from 25 pages per worker)")
+    parser.add_argument("--toc-first", action="store_true",
+                        help="Take headings from the PDF bookmarks when they look complete")
+    parser.add_argument("--decode", choices=DECODE_PROFILES, default="default",
+                        help="text = no image blocks; text-fast = also expand ligatures and normalize whitespace")
+    parser.add_argument("--clip-margins", type=float, nargs=4, metavar=("LEFT", "TOP", "RIGHT", "BOTTOM"),
+                        help="Ignore page margins of this many points when decoding text")
+    parser.add_argument("--mmr-lambda", type=float, default=None,
+                        help="Top-k by Maximal Marginal Relevance (1.0 = relevance only, lower = more diverse)")
+    parser.add_argument("--doc-cap", type=int, default=0,
+                        help="At most this many selected sections per PDF (0 = no cap)")
+    parser.add_argument("--dedup", type=float, default=0.0, metavar="THRESHOLD",
+                        help="Fold near-duplicate sections (MinHash Jaccard >= THRESHOLD, e.g. 0.8) before ranking")
+    parser.add_argument("--keywords", choices=("yake", "tfidf"), default="yake",
+                        help="yake = per section; tfidf = one TF-IDF model (1-3-grams) over the whole collection")
+    parser.add_argument("--profile-dir", type=Path,
+                        help="Write cProfile + tracemalloc artifacts per PDF (<name>.prof, <name>.profile.txt)")
+    parser.add_argument("--profile-docs", nargs="+", metavar="GLOB",
+                        help="Only profile these documents (names or globs)")
+    parser.add_argument("--profile-threshold", type=float, metavar="SECONDS",
+                        help="Profile every document but keep artifacts only for those slower than this")
+    parser.add_argument("--metrics-file", type=Path,
+                        help="Prometheus text file rewritten after every collection")
+    parser.add_argument("--metrics-port", type=int, help="Serve Prometheus metrics on http://HOST:PORT/metrics")
+    parser.add_argument("--metrics-host", default="127.0.0.1",
+                        help="Interface for --metrics-port (0.0.0.0 to scrape from outside a container)")
+    parser.add_argument("--strip-boilerplate", action="store_true",
+                        help="Remove running headers/footers (lines repeated in the page margins)")
+    parser.add_argument("--skip-existing", action="store_true",
+                        help="Reuse outline JSONs that are newer than their PDF and were extracted with the same options")
+    parser.add_argument("--cache-dir", type=Path,
+                        help="Directory for outline JSONs, passage embeddings and the summary cache "
+                             "(default: outlines inside each collection, nothing else cached)")
+    parser.add_argument("--output-profile", choices=["challenge", "detailed"], default="challenge",
+                        help="detailed adds scores, keywords and matched text to the output")
+    parser.add_argument("--encoder-model", default=ENCODER_MODEL, help="SentenceTransformer name or local path")
+    parser.add_argument("--summarizer-model", default=SUMMARIZER_MODEL, help="Flan-T5 name or local path")
+    parser.add_argument("--queries", type=Path,
+                        help="JSON list of tasks or {persona, task} objects to run against every collection")
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--ranker", choices=["dense", "hybrid"], default="dense",
+                        help="hybrid = BM25 over lemmas/keywords as first stage, then dense scoring")
+    parser.add_argument("--candidates", type=int, default=100, help="BM25 candidates kept per query (hybrid)")
+    parser.add_argument("--fusion", choices=["rrf", "linear"], default="rrf")
+    parser.add_argument("--alpha", type=float, default=0.5, help="Dense weight for linear fusion")
+    parser.add_argument("--precision", choices=["float32", "float16", "int8"], default="float32",
+                        help="Storage/scoring precision of the section embedding matrix")
+    parser.add_argument("--parity-report", action="store_true",
+                        help="Write ranking overlap of float16/int8 against float32 per collection")
+    parser.add_argument("--token-budget", type=int, default=8192,
+                        help="Max padded tokens per length-sorted encoding batch")
+    parser.add_argument("--no-windowing", action="store_true",
+                        help="Embed each section as one (truncated) passage instead of sentence windows")
+    parser.add_argument("--summarizer", choices=sorted(SUMMARIZERS), default="t5",
+                        help="t5 = Flan-T5 beam search, t5-fast = greedy with a shorter prompt and "
+                             "length-scaled output, extractive = top task-relevant/central sentences")
+    parser.add_argument("--deadline", type=float,
+                        help="Wall-clock seconds per collection before summaries fall back to extractive")
+    parser.add_argument("--summary-cache", type=Path,
+                        help="Persistent JSON cache of T5 summaries, reused across runs")
+    parser.add_argument("--summary-cache-size", type=int, default=10000, help="Max cached summaries (LRU)")
+    parser.add_argument("--passage-overlap", type=int, default=1, help="Sentences shared by adjacent windows")
+    parser.add_argument("--backend", choices=["torch", "onnx"], default="torch",
+                        help="Inference backend for MiniLM and Flan-T5")
+    parser.add_argument("--onnx-dir", type=Path, default=ONNX_DIR, help="Directory of exported ONNX models")
+    parser.add_argument("--export-onnx", action="store_true",
+                        help="Export MiniLM and Flan-T5 to --onnx-dir (int8 dynamic quantization) and exit; "
+                             "reads them from --model-bundle when given")
+    parser.add_argument("--no-quantize", action="store_true", help="Skip int8 quantization when exporting")
+    parser.add_argument("--backend-parity", action="store_true",
+                        help="Compare ONNX scores and summaries against PyTorch per collection")
+    parser.add_argument("--model-bundle", type=Path,
+                        help="Load MiniLM, Flan-T5 and spaCy from a local bundle built by model_bundle.py")
+    return parser
+
 
 if __name__ == "__main__":
-    main()
+    main(build_parser().parse_args())
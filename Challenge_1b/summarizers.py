@@ -0,0 +1,178 @@
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+
+import torch
+
+# ------------------------ Summarizer Interface ------------------------
+class Summarizer(ABC):
+    """Turns a matched section into `refined_text`.
+
+    `sentences` and `query_embedding` are optional context; abstractive
+    summarizers may ignore them.
+    """
+    name = "base"
+
+    @abstractmethod
+    def summarize(self, text: str, semantic: dict, sentences=None, query_embedding=None) -> str:
+        ...
+
+    def prepare(self, sentence_lists):
+        """Called once with the sentences of every section a batch is about to summarize."""
+
+# ------------------------ Flan-T5 (abstractive) ------------------------
+# quality = the original beam search; fast = greedy, shorter prompt, output length scaled to the section
+T5_MODES = {
+    "quality": {"num_beams": 2, "list_limit": 20, "max_input_tokens": 512, "dynamic_length": False},
+    "fast": {"num_beams": 1, "list_limit": 5, "max_input_tokens": 384, "dynamic_length": True},
+}
+
+class T5Summarizer(Summarizer):
+    name = "t5"
+    PROMPT_TEMPLATE = (
+        "Summarize for a business user:\n"
+        "Text: {text}\n"
+        "Important Tokens: {tokens}\n"
+        "Nouns: {nouns}\n"
+        "Verbs: {verbs}\n"
+        "Lemmas: {lemmas}"
+    )
+
+    def __init__(self, model_name: str = "google/flan-t5-small", max_tokens: int = 128, cache=None,
+                 mode: str = "quality"):
+        if mode not in T5_MODES:
+            raise ValueError(f"Unknown T5 mode: {mode}")
+        print("🧠 Loading Flan-T5-small summarizer...")
+        tsum = time.time()
+        self.model_name = model_name
+        self.max_tokens = max_tokens
+        self.mode = T5_MODES[mode]
+        self.cache = cache
+        self.tokenizer, self.model = self.load_model(model_name)
+        print(f"✅ Summarizer loaded in {time.time() - tsum:.2f} sec")
+
+    def load_model(self, model_name: str):
+        from transformers import T5Tokenizer, T5ForConditionalGeneration
+
+        return T5Tokenizer.from_pretrained(model_name), T5ForConditionalGeneration.from_pretrained(model_name)
+
+    def build_prompt(self, text: str, semantic: dict) -> str:
+        def join_and_limit(lst, max_len=self.mode["list_limit"]):
+            return " ".join(lst[:max_len]) if isinstance(lst, list) else ""
+
+        return self.PROMPT_TEMPLATE.format(
+            text=text,
+            tokens=join_and_limit(semantic.get("tokens", [])),
+            nouns=join_and_limit(semantic.get("nouns", [])),
+            verbs=join_and_limit(semantic.get("verbs", [])),
+            lemmas=join_and_limit(semantic.get("lemmas", []))
+        )
+
+    def generation_params(self, text: str) -> dict:
+        if not self.mode["dynamic_length"]:
+            return {"max_length": self.max_tokens, "num_beams": self.mode["num_beams"], "repetition_penalty": 1.3}
+        # Roughly a third of the section's words, bounded to [24, max_tokens]
+        max_new_tokens = max(24, min(self.max_tokens, len(text.split()) // 3))
+        return {"max_new_tokens": max_new_tokens, "num_beams": self.mode["num_beams"], "repetition_penalty": 1.3}
+
+    def generate(self, prompt: str, generation: dict) -> str:
+        input_ids = self.tokenizer(prompt, return_tensors="pt", truncation=True,
+                                   max_length=self.mode["max_input_tokens"]).input_ids
+        output_ids = self.model.generate(input_ids, **generation)
+        return self.tokenizer.decode(output_ids[0], skip_special_tokens=True)
+
+    def summarize(self, text: str, semantic: dict, sentences=None, query_embedding=None) -> str:
+        prompt = self.build_prompt(text, semantic)
+        generation = self.generation_params(text)
+        if self.cache is None:
+            return self.generate(prompt, generation)
+
+        # The prompt already contains the section text and semantic lists
+        key = self.cache.make_key(self.model_name, self.PROMPT_TEMPLATE, prompt, generation)
+        summary = self.cache.get(key)
+        if summary is None:
+            summary = self.generate(prompt, generation)
+            self.cache.put(key, summary)
+        return summary
+
+# ------------------------ Extractive ------------------------
+class ExtractiveSummarizer(Summarizer):
+    """Picks the section sentences closest to the task and to the rest of the section."""
+    name = "extractive"
+
+    def __init__(self, model, max_sentences: int = 3, task_weight: float = 0.7, max_cached: int = 20000):
+        self.model = model
+        self.max_sentences = max_sentences
+        self.task_weight = task_weight
+        self.max_cached = max_cached
+        self.sentence_vectors = OrderedDict()  # LRU: sentence -> normalized embedding, shared across queries
+
+    @staticmethod
+    def usable(sentences) -> list:
+        return [s for s in (sentences or []) if s.strip()]
+
+    def encode(self, sentences):
+        unique = list(dict.fromkeys(sentences))
+        for s in unique:
+            if s in self.sentence_vectors:
+                self.sentence_vectors.move_to_end(s)
+        missing = [s for s in unique if s not in self.sentence_vectors]
+        if missing:
+            vectors = self.model.encode(missing, convert_to_tensor=True, show_progress_bar=False)
+            vectors = torch.nn.functional.normalize(vectors.float(), p=2, dim=1)
+            self.sentence_vectors.update(zip(missing, vectors))
+        stacked = torch.stack([self.sentence_vectors[s] for s in sentences])
+        # Evict only after stacking, so a batch larger than the cache still gets all its vectors
+        while len(self.sentence_vectors) > self.max_cached:
+            self.sentence_vectors.popitem(last=False)
+        return stacked
+
+    def prepare(self, sentence_lists):
+        # Every sentence of the sections about to be summarized is encoded here in one batch
+        sentences = [s for sentences in sentence_lists
+                     if len(self.usable(sentences)) > self.max_sentences for s in self.usable(sentences)]
+        if sentences:
+            self.encode(sentences)
+
+    def summarize(self, text: str, semantic: dict, sentences=None, query_embedding=None) -> str:
+        sentences = self.usable(sentences)
+        if len(sentences) <= self.max_sentences:
+            return " ".join(sentences) if sentences else text[:500]
+
+        vectors = self.encode(sentences)
+        similarity = vectors @ vectors.T
+        centrality = (similarity.sum(dim=1) - 1) / (len(sentences) - 1)
+        if query_embedding is not None:
+            query = torch.nn.functional.normalize(torch.as_tensor(query_embedding).float().reshape(1, -1), p=2, dim=1)
+            relevance = (vectors @ query.T).squeeze(1)
+            scores = self.task_weight * relevance + (1 - self.task_weight) * centrality
+        else:
+            scores = centrality
+
+        picked = sorted(torch.topk(scores, k=self.max_sentences).indices.tolist())
+        return " ".join(sentences[i] for i in picked)
+
+# ------------------------ Deadline Fallback ------------------------
+class DeadlineSummarizer(Summarizer):
+    """Uses `primary` until the per-collection deadline passes, then `fallback`."""
+
+    def __init__(self, primary: Summarizer, fallback: Summarizer, budget_seconds: float):
+        self.primary = primary
+        self.fallback = fallback
+        self.budget_seconds = budget_seconds
+        self.name = f"{primary.name} (deadline {budget_seconds:g}s, fallback {fallback.name})"
+        self.reset()
+
+    def reset(self):
+        self.deadline = time.monotonic() + self.budget_seconds
+        self.fallbacks = 0
+
+    def prepare(self, sentence_lists):
+        # Only the fallback would need vectors, and only once the deadline has passed
+        self.primary.prepare(sentence_lists)
+
+    def summarize(self, text: str, semantic: dict, sentences=None, query_embedding=None) -> str:
+        if time.monotonic() < self.deadline:
+            return self.primary.summarize(text, semantic, sentences, query_embedding)
+        self.fallbacks += 1
+        return self.fallback.summarize(text, semantic, sentences, query_embedding)
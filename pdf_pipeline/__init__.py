@@ -0,0 +1,22 @@
+# Shared PDF extraction + NLP used by both Challenge 1A (process_pdfs) and 1B (semantic_matcher)
+
+from .extraction import (
+    extract_document_outline,
+    open_pdf,
+    extract_keywords_yake,
+    extract_keywords_tfidf,
+    KEYWORD_BACKENDS,
+    require_keyword_backend,
+    clean_paragraph_lines,
+    clean_section_data,
+    apply_output_profile,
+    profile_needs_nlp,
+    OUTPUT_PROFILES,
+    DECODE_PROFILES,
+    decode_options,
+    benchmark_decode,
+)
+from .sources import iter_pdf_sources, is_archive
+from .profiling import document_profiler
+from .metrics import METRICS, Metrics, record_document
+from .nlp_utils import analyze_text, get_sentences, load_spacy
@@ -0,0 +1,829 @@
+from pathlib import Path
+import fitz
+import mmap
+import re
+import time
+from collections import Counter
+import unicodedata
+
+from .nlp_utils import clean_text, analyze_text, get_sentences
+
+# ------------------------ Helper: Improved Heading Detector ------------------------
+def is_heading_candidate(line_text, spans, vertical_gap, font_size_thresholds, next_line_indent=False):
+    text = line_text.strip()
+    avg_font_size = sum(span["size"] for span in spans) / len(spans)
+    is_bold = any("bold" in span["font"].lower() for span in spans)
+    is_italic = any("italic" in span["font"].lower() for span in spans)
+    is_underlined = any(span.get("flags", 0) & 4 for span in spans)
+
+    is_short = len(text.split()) <= 10
+    is_caps = text.isupper() or text.istitle()
+
+    font_based = avg_font_size >= font_size_thresholds["h1"]
+    visual_clue = (is_bold and is_short and is_caps and vertical_gap > 5)
+    indent_clue = next_line_indent
+
+    # NEW: Force heading if underline + (bold or italic)
+    force_heading = is_underlined and (is_bold or is_italic)
+
+    return font_based or visual_clue or indent_clue or force_heading
+
+# ------------------------ Improved Heading Level Mapper ------------------------
+def get_heading_level(avg_font_size, font_size_thresholds, spans, body_font_size):
+    if avg_font_size >= font_size_thresholds["h1"]:
+        level = "H1"
+    elif avg_font_size >= font_size_thresholds["h2"] and avg_font_size > body_font_size:
+        level = "H2"
+    elif avg_font_size >= font_size_thresholds["h3"] and avg_font_size > body_font_size:
+        level = "H3"
+    else:
+        level = "H3"
+
+    is_bold = any("bold" in span["font"].lower() for span in spans)
+    is_italic = any("italic" in span["font"].lower() for span in spans)
+    is_underlined = any(span.get("flags", 0) & 4 for span in spans)
+
+    # Only underline + (bold or italic) at body font size forces H2
+    if round(avg_font_size, 1) == round(body_font_size, 1):
+        if is_underlined and (is_bold or is_italic):
+            level = "H2"
+
+    return level
+
+# ------------------------ Keyword Extractor ------------------------
+_kw_extractor = None
+
+def get_keyword_extractor():
+    # YAKE is imported on first use so outline-only runs never pay for it
+    global _kw_extractor
+    if _kw_extractor is None:
+        import yake
+        _kw_extractor = yake.KeywordExtractor(
+            lan="en",
+            n=3,
+            top=30,
+            dedupLim=0.9
+        )
+    return _kw_extractor
+
+# yake = per-section YAKE, tfidf = one TF-IDF fit over all sections of the document,
+# none = leave keywords empty (e.g. for a collection-level TF-IDF pass by the caller)
+KEYWORD_BACKENDS = ("yake", "tfidf", "none")
+
+def require_keyword_backend(keywords: str):
+    """Check the backend and its optional library up front, outside the per-document error handling."""
+    if keywords not in KEYWORD_BACKENDS:
+        raise ValueError(f"Unknown keyword backend: {keywords}")
+    if keywords == "tfidf":
+        try:
+            import sklearn  # noqa: F401
+        except ImportError:
+            raise ImportError("The tfidf keyword backend needs scikit-learn: pip install scikit-learn") from None
+
+def extract_keywords_yake(text: str, max_keywords: int = 10) -> list:
+    raw_keywords = get_keyword_extractor().extract_keywords(text)
+    return filter_keywords([kw for kw, score in raw_keywords], max_keywords)
+
+TFIDF_CLAUSE_BREAK = re.compile(r"[.,;:!?()\[\]{}\"\u2022]")
+TFIDF_TOKEN = re.compile(r"\w+")
+
+def phrase_ngrams(text: str, stop_words, max_n: int = 3) -> list:
+    # 1..max_n-grams inside runs of adjacent kept words: a stop word, a one-letter word or
+    # clause punctuation ends the run, so no n-gram bridges a removed token
+    ngrams = []
+    for clause in TFIDF_CLAUSE_BREAK.split(text.lower()):
+        run = []
+        for token in TFIDF_TOKEN.findall(clause) + [""]:
+            if len(token) > 1 and token not in stop_words:
+                run.append(token)
+                continue
+            for n in range(1, max_n + 1):
+                ngrams.extend(" ".join(run[i:i + n]) for i in range(len(run) - n + 1))
+            run = []
+    return ngrams
+
+def extract_keywords_tfidf(texts, max_keywords: int = 10, candidates: int = 30) -> list:
+    """Keywords for every text from one sparse TF-IDF fit (1-3-grams) over all of them."""
+    import numpy as np
+    from sklearn.feature_extraction.text import ENGLISH_STOP_WORDS, TfidfVectorizer
+
+    texts = list(texts)
+    vectorizer = TfidfVectorizer(analyzer=lambda text: phrase_ngrams(text, ENGLISH_STOP_WORDS),
+                                 sublinear_tf=True)
+    try:
+        matrix = vectorizer.fit_transform(texts).tocsr()
+    except ValueError:
+        # Empty vocabulary: nothing but stop words, or no texts at all
+        return [[] for _ in texts]
+    features = vectorizer.get_feature_names_out()
+
+    results = []
+    for row in range(matrix.shape[0]):
+        start, end = matrix.indptr[row], matrix.indptr[row + 1]
+        scores, terms = matrix.data[start:end], matrix.indices[start:end]
+        k = min(candidates, len(scores))
+        if k == 0:
+            results.append([])
+            continue
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.lexsort((terms[top], -scores[top]))]
+        results.append(filter_keywords(features[terms[top]], max_keywords))
+    return results
+
+def filter_keywords(candidates, max_keywords: int = 10) -> list:
+    # Candidates best-first; drops stop terms and phrases contained in a longer kept phrase
+    keywords = []
+
+    for kw in candidates:
+        kw = kw.strip("\u2022o•").strip().lower()
+        if kw in {"cup", "tablespoon", "teaspoon", "ingredient", "instructions"}:
+            continue
+        if len(kw) < 3 or kw.isdigit():
+            continue
+        if re.match(r"^(page|version|may|june|july|©|international|qualifications board)", kw):
+            continue
+        kw = re.sub(r"^(page|version|©)?\s?\d{1,4}", '', kw).strip()
+        keywords.append(kw)
+
+    final_keywords = []
+    for kw in keywords:
+        if not any(kw in other and kw != other for other in keywords):
+            final_keywords.append(kw)
+
+    return list(dict.fromkeys(final_keywords))[:max_keywords]
+
+# ------------------------ Paragraph Cleaner ------------------------
+def clean_paragraph_lines(paragraphs: list[str]) -> list[str]:
+    filtered = []
+    for line in paragraphs:
+        line = line.strip()
+        if not line:
+            continue
+        if re.match(r"^page\s?\d+", line.lower()):
+            continue
+        if re.match(r"^version\s?\d{4}", line.lower()):
+            continue
+        if "qualifications board" in line.lower():
+            continue
+        if "©" in line or "copyright" in line.lower():
+            continue
+        if line.isdigit():
+            continue
+        if len(line) < 4:
+            continue
+        filtered.append(line)
+    return filtered
+
+
+# ------------------------ Unicode Cleaner ------------------------
+def clean_text(text):
+    if not text:
+        return ""
+    # Replace common artifacts with proper equivalents
+    replacements = {
+        "\u2022": "-",  # bullet
+        "\u2019": "'",  # smart single quote
+        "\u201c": '"',  # smart left double quote
+        "\u201d": '"',  # smart right double quote
+        "\u2014": "-",  # em dash
+        "\u2013": "-",  # en dash
+        "\ufb00": "ff", # ff ligature
+        "\ufb01": "fi", # fi ligature
+        "\u2018": "'",  # left single quote
+        "\u2026": "...", # ellipsis
+        "\u00a0": " ",  # non-breaking space
+    }
+    
+    for old, new in replacements.items():
+        text = text.replace(old, new)
+    
+    # Normalize other Unicode characters
+    text = unicodedata.normalize('NFKD', text)
+    # Remove remaining non-ASCII characters
+    text = re.sub(r'[^\x00-\x7F]+', '', text)
+    return text.strip()
+
+def clean_section_data(section):
+    """Clean all text fields in a section dictionary"""
+    section["text"] = clean_text(section["text"])
+    section["paragraphs"] = [clean_text(p) for p in section["paragraphs"]]
+    section["keywords"] = [clean_text(k) for k in section["keywords"]]
+    section["sentences"] = [clean_text(s) for s in section["sentences"]]
+    
+    if "semantic" in section:
+        semantic = section["semantic"]
+        for key in ["tokens", "nouns", "verbs", "lemmas"]:
+            if key in semantic:
+                semantic[key] = [clean_text(t) for t in semantic[key]]
+        if "lemma_counts" in semantic:
+            counts = Counter()
+            for lemma, count in semantic["lemma_counts"].items():
+                counts[clean_text(lemma)] += count
+            semantic["lemma_counts"] = dict(counts)
+    
+    return section
+
+
+# ------------------------ Section NLP ------------------------
+def section_text(section) -> str:
+    return " ".join(clean_paragraph_lines(section["paragraphs"]))
+
+def annotate_section(section, with_nlp: bool = True, keywords: str = "yake"):
+    if not with_nlp:
+        return section
+    full_text = section_text(section)
+    if keywords == "yake":
+        section["keywords"] = extract_keywords_yake(full_text)
+    section["sentences"] = get_sentences(full_text)
+    section["semantic"] = analyze_text(clean_text(full_text))
+    return section
+
+
+# ------------------------ Output Profiles ------------------------
+# full = sections with keywords/sentences/semantic, outline = sections without NLP,
+# schema = only title + {level, text, page} as in sample_dataset/schema/output_schema.json
+OUTPUT_PROFILES = ("full", "outline", "schema")
+
+def profile_needs_nlp(profile: str) -> bool:
+    return profile == "full"
+
+def apply_output_profile(data: dict, profile: str = "full") -> dict:
+    if profile not in OUTPUT_PROFILES:
+        raise ValueError(f"Unknown output profile: {profile}")
+    if profile == "schema":
+        return {
+            "title": data["title"],
+            "outline": [{"level": s["level"], "text": s["text"], "page": s["page"]} for s in data["outline"]]
+        }
+    return data
+
+
+# ------------------------ Document Sources ------------------------
+IN_MEMORY_TYPES = (bytes, bytearray, memoryview, mmap.mmap)
+
+def is_in_memory(source) -> bool:
+    return isinstance(source, IN_MEMORY_TYPES)
+
+def open_pdf(source):
+    """Open a PDF from a path, or from bytes / memoryview / mmap without a temp file."""
+    if is_in_memory(source):
+        try:
+            return fitz.open(stream=source, filetype="pdf")
+        except TypeError:
+            # Older PyMuPDF builds only take bytes / bytearray streams
+            return fitz.open(stream=bytes(source), filetype="pdf")
+    return fitz.open(source)
+
+# ------------------------ Page Triage ------------------------
+# Pages without text are found by the decode the statistics pass (or, for bookmarked pages,
+# segmentation) does anyway, so triage costs no extra pass over the document
+def lines_have_text(lines) -> bool:
+    return any(span['text'].strip() for line in lines for span in line['spans'])
+
+def skipped_page(page, page_num: int) -> dict:
+    return {"page": page_num + 1, "reason": "image-only" if page.get_images() else "empty"}
+
+# ------------------------ Decode Profiles ------------------------
+# default = PyMuPDF's dict flags (images, ligatures, whitespace preserved),
+# text = no image blocks, text-fast = also expands ligatures and normalizes whitespace
+DECODE_PROFILES = ("default", "text", "text-fast")
+
+def decode_options(profile: str = "default", clip_margins=None):
+    """Settings for page.get_text('dict'); clip_margins = (left, top, right, bottom) in points to ignore."""
+    if profile not in DECODE_PROFILES:
+        raise ValueError(f"Unknown decode profile: {profile}")
+    # Start from the default dict flags so each profile differs from it only in the bits it names
+    flags = None
+    if profile in ("text", "text-fast"):
+        flags = fitz.TEXTFLAGS_DICT & ~fitz.TEXT_PRESERVE_IMAGES
+    if profile == "text-fast":
+        flags &= ~(fitz.TEXT_PRESERVE_LIGATURES | fitz.TEXT_PRESERVE_WHITESPACE)
+    if flags is None and not clip_margins:
+        return None
+    return {"flags": flags, "clip_margins": tuple(clip_margins) if clip_margins else None}
+
+def get_text_kwargs(page, decode) -> dict:
+    if not decode:
+        return {}
+    kwargs = {}
+    if decode.get("flags") is not None:
+        kwargs["flags"] = decode["flags"]
+    if decode.get("clip_margins"):
+        left, top, right, bottom = decode["clip_margins"]
+        rect = page.rect
+        kwargs["clip"] = fitz.Rect(rect.x0 + left, rect.y0 + top, rect.x1 - right, rect.y1 - bottom)
+    return kwargs
+
+# ------------------------ Page Decoding ------------------------
+def page_text_lines(page, decode=None) -> list:
+    lines = []
+    for b in page.get_text('dict', **get_text_kwargs(page, decode))['blocks']:
+        if b['type'] == 0:
+            for line in b['lines']:
+                lines.append(line)
+    return lines
+
+def count_font_sizes(doc, page_range) -> Counter:
+    return page_statistics(doc, page_range)[0]
+
+def page_statistics(doc, page_range, decode=None, skipped=None):
+    """One decoding pass: span font-size counts and, per line position key, the number of pages it is on.
+
+    With a skipped list, pages without text are appended to it (see skipped_page)
+    instead of counted. A page whose resources name no font is not decoded at all;
+    fonts alone never keep a page, because scans often share the resource
+    dictionary of the text pages.
+    """
+    font_sizes = Counter()
+    line_positions = Counter()
+    for page_num in page_range:
+        page = doc.load_page(page_num)
+        if skipped is not None and not page.get_fonts():
+            skipped.append(skipped_page(page, page_num))
+            continue
+        lines = page_text_lines(page, decode)
+        if skipped is not None and not lines_have_text(lines):
+            skipped.append(skipped_page(page, page_num))
+            continue
+        keys = set()
+        for line in lines:
+            for span in line['spans']:
+                font_sizes[round(span['size'], 1)] += 1
+            key = line_position_key(line, page_height=page.rect.height)
+            if key:
+                keys.add(key)
+        line_positions.update(keys)
+    return font_sizes, line_positions
+
+def font_thresholds_for(body_font_size) -> dict:
+    return {
+        "h1": body_font_size + 3,
+        "h2": body_font_size + 2,
+        "h3": body_font_size + 1
+    }
+
+# ------------------------ Running Header / Footer Detector ------------------------
+# Only lines in the top or bottom 12% of the page can be running headers/footers,
+# so repeated body lines ("Ingredients:" on every recipe page) are never dropped
+BOILERPLATE_MARGIN = 0.12
+
+def line_position_key(line, line_text: str = None, page_height: float = None):
+    # Same text at the same height, with page numbers and dates normalized away
+    if not line['spans']:
+        return None
+    if page_height:
+        top, bottom = line['bbox'][1], line['bbox'][3]
+        if BOILERPLATE_MARGIN * page_height < top and bottom < (1 - BOILERPLATE_MARGIN) * page_height:
+            return None
+    if line_text is None:
+        line_text = " ".join([span['text'] for span in line['spans']]).strip()
+    text = re.sub(r"\d+", "#", " ".join(line_text.lower().split()))
+    if not re.search(r"[a-z#]", text):
+        # Bare bullets and rules repeat at the top of every list page without being headers
+        return None
+    return text, round(line['spans'][0]['bbox'][1] / 4)
+
+def find_boilerplate(line_positions: Counter, pages_scanned: int, min_pages: int = 3,
+                     min_ratio: float = 0.5) -> frozenset:
+    threshold = max(min_pages, min_ratio * pages_scanned)
+    return frozenset(key for key, pages in line_positions.items() if pages >= threshold)
+
+# ------------------------ TOC-Driven Headings ------------------------
+# Minimum share of TOC entries found in their page's text for --toc-first to trust the TOC
+TOC_MIN_MATCHED = 0.6
+
+def toc_is_plausible(toc, page_count: int, min_entries: int = 3) -> bool:
+    if len(toc) < min_entries:
+        return False
+    pages = [t["page"] for t in toc]
+    if any(page < 1 or page > page_count for page in pages) or any(not t["text"] for t in toc):
+        return False
+    # Bookmarks should follow page order; tolerate a few out-of-order entries
+    backwards = sum(1 for a, b in zip(pages, pages[1:]) if b < a)
+    return backwards <= len(pages) // 10
+
+def toc_headings_by_page(toc, page_count: int) -> dict:
+    """Each bookmarked page -> its TOC entries as (level, text)."""
+    headings = {}
+    for t in toc:
+        headings.setdefault(t["page"] - 1, []).append((f"H{min(t['level'], 3)}", t["text"]))
+    return headings
+
+def toc_match_ratio(doc, toc_headings, decode=None) -> float:
+    """Share of TOC entries whose heading line is found on their page."""
+    matched = total = 0
+    for page_num, entries in toc_headings.items():
+        lines = [" ".join(span['text'] for span in line['spans']).strip()
+                 for line in page_text_lines(doc.load_page(page_num), decode)]
+        total += len(entries)
+        matched += sum(1 for _, text in entries if any(matches_toc_entry(line, text) for line in lines))
+    return matched / total if total else 0.0
+
+def normalize_heading(text: str) -> str:
+    return re.sub(r"\W+", " ", text).strip().lower()
+
+def matches_toc_entry(line_text: str, toc_text: str) -> bool:
+    line, entry = normalize_heading(line_text), normalize_heading(toc_text)
+    if not line:
+        return False
+    # A bookmark title can wrap over several lines; its first line is enough to place it
+    return line == entry or (entry.startswith(line) and len(line) * 2 >= len(entry))
+
+# ------------------------ Segmentation ------------------------
+def open_section(state, level, text, page_num: int, with_nlp: bool = True) -> dict:
+    # A carried-over fragment belongs to the previous range's last section; the merge annotates it
+    current_section = state["current"]
+    if current_section and current_section["paragraphs"] and not current_section.get("carry"):
+        annotate_section(current_section, with_nlp, state.get("keywords", "yake"))
+
+    section = {
+        "level": level,
+        "text": text,
+        "page": page_num + 1,
+        "paragraphs": [],
+        "keywords": [],
+        "sentences": [],
+        "semantic": {}
+    }
+    state["outline"].append(section)
+    state["current"] = section
+    return section
+
+def segment_pages(doc, page_range, font_thresholds, body_font_size, state, with_nlp: bool = True,
+                  toc_headings=None, boilerplate=frozenset(), decode=None):
+    """Split lines of page_range into sections, appending them to state["outline"].
+
+    state carries "current" (the open section) and "prev_y" between calls, so
+    a document can be segmented in one call or range by range. A section is
+    annotated when the next heading closes it; the last one is left open.
+    A line matching one of its page's toc_headings entries opens that
+    bookmarked section; every other line goes through the font/indent
+    heuristic, so pages and passages without bookmarks still get headings. Lines in boilerplate
+    (running headers and footers) are dropped before classification.
+    """
+    for page_num in page_range:
+        page = doc.load_page(page_num)
+        page_height = page.rect.height
+        lines = page_text_lines(page, decode)
+        pending = list(toc_headings[page_num]) if toc_headings and page_num in toc_headings else None
+        if "skipped_pages" in state and not lines_have_text(lines):
+            # Bookmarked pages skip the statistics pass, so their emptiness is only known here
+            state["skipped_pages"].append(skipped_page(page, page_num))
+
+        i = 0
+        while i < len(lines):
+            line = lines[i]
+            if not line['spans']:
+                i += 1
+                continue
+
+            line_text = " ".join([span['text'] for span in line['spans']]).strip()
+            if not line_text or (boilerplate and line_position_key(line, line_text, page_height) in boilerplate):
+                i += 1
+                continue
+
+            line_y = line['spans'][0]['bbox'][1]
+            vertical_gap = line_y - state["prev_y"] if state["prev_y"] is not None else 0
+            state["prev_y"] = line_y
+
+            this_x = line['spans'][0]['bbox'][0]
+
+            # Any entry of the page may match: one missing or out-of-order bookmark must not
+            # stop the page's other headings from being placed
+            match = next((k for k, (_, text) in enumerate(pending or []) if matches_toc_entry(line_text, text)), None)
+            if match is not None:
+                heading_level, heading_text = pending.pop(match)
+                # The wrapped rest of the bookmarked title is part of the heading, not a new one
+                while i + 1 < len(lines) and lines[i + 1]['spans']:
+                    wrapped = f"{line_text} {' '.join(span['text'] for span in lines[i + 1]['spans']).strip()}"
+                    if not normalize_heading(heading_text).startswith(normalize_heading(wrapped)):
+                        break
+                    line_text = wrapped
+                    i += 1
+                is_heading = True
+            else:
+                avg_font_size = sum(span["size"] for span in line['spans']) / len(line['spans'])
+                heading_level = get_heading_level(avg_font_size, font_thresholds, line['spans'], body_font_size)
+                heading_text = line_text
+
+                next_line_indent = False
+                if i + 1 < len(lines):
+                    next_x = lines[i + 1]['spans'][0]['bbox'][0]
+                    if next_x - this_x > 10:
+                        next_line_indent = True
+                is_heading = is_heading_candidate(line_text, line['spans'], vertical_gap, font_thresholds,
+                                                  next_line_indent)
+
+            current_section = state["current"]
+            if is_heading:
+                current_section = open_section(state, heading_level, heading_text, page_num, with_nlp)
+
+                j = i + 1
+                while j < len(lines):
+                    next_line = lines[j]
+                    if not next_line['spans']:
+                        j += 1
+                        continue
+
+                    next_line_text = " ".join([span['text'] for span in next_line['spans']]).strip()
+                    if not next_line_text or (
+                            boilerplate and line_position_key(next_line, next_line_text, page_height) in boilerplate):
+                        j += 1
+                        continue
+
+                    next_x = next_line['spans'][0]['bbox'][0]
+                    if next_x - this_x > 10:
+                        current_section["paragraphs"].append(next_line_text)
+                        j += 1
+                    else:
+                        break
+                i = j
+            elif current_section:
+                current_section["paragraphs"].append(line_text)
+                i += 1
+            else:
+                i += 1
+
+        # Bookmarks whose heading line was not found (drawn as an image, reworded) still open a section
+        for level, text in pending or []:
+            open_section(state, level, text, page_num, with_nlp)
+    return state
+
+# ------------------------ Page-Range Parallelism ------------------------
+def split_page_ranges(page_count: int, parts: int) -> list:
+    size = -(-page_count // parts)
+    return [(start, min(start + size, page_count)) for start in range(0, page_count, size)]
+
+def _statistics_range(pdf_path, start: int, end: int, decode=None):
+    # Returns (font sizes, line positions, pages without text)
+    doc = fitz.open(pdf_path)
+    try:
+        skipped = []
+        return (*page_statistics(doc, range(start, end), decode, skipped), skipped)
+    finally:
+        doc.close()
+
+def _prev_y_before(doc, start: int, font_thresholds, body_font_size, boilerplate, skip_pages, decode):
+    # prev_y entering `start` is the y of the last line segmented on the nearest earlier page with text
+    for page_num in range(start - 1, -1, -1):
+        if page_num in skip_pages:
+            continue
+        state = {"current": {"paragraphs": [], "carry": True}, "prev_y": None, "outline": []}
+        segment_pages(doc, [page_num], font_thresholds, body_font_size, state, with_nlp=False,
+                      boilerplate=boilerplate, decode=decode)
+        if state["prev_y"] is not None:
+            return state["prev_y"]
+    return None
+
+def _segment_range(pdf_path, start: int, end: int, font_thresholds, body_font_size, with_nlp: bool,
+                   boilerplate=frozenset(), skip_pages=frozenset(), decode=None, keywords: str = "yake"):
+    # Each worker opens the document itself; returns (lines before the first heading, sections)
+    doc = fitz.open(pdf_path)
+    try:
+        carry = {"paragraphs": [], "carry": True}
+        state = {
+            "current": carry,
+            "prev_y": _prev_y_before(doc, start, font_thresholds, body_font_size, boilerplate, skip_pages, decode),
+            "outline": [],
+            "keywords": keywords
+        }
+        pages = [p for p in range(start, end) if p not in skip_pages]
+        segment_pages(doc, pages, font_thresholds, body_font_size, state, with_nlp, boilerplate=boilerplate,
+                      decode=decode)
+        return carry["paragraphs"], state["outline"]
+    finally:
+        doc.close()
+
+def segment_parallel(pdf_path, page_count: int, workers: int, with_nlp: bool = True,
+                     strip_boilerplate: bool = False, decode=None, keywords: str = "yake", stage_sec=None):
+    """Font statistics and segmentation over page ranges in worker processes, merged in page order.
+
+    Returns (body font size, outline, skipped pages); the statistics workers
+    also find the pages without text, which segmentation then skips.
+    stage_sec, if given, receives the seconds of the statistics pass (pool start-up included).
+    """
+    from concurrent.futures import ProcessPoolExecutor
+
+    t0 = time.perf_counter()
+    ranges = split_page_ranges(page_count, workers)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        font_size_counts = Counter()
+        line_positions = Counter()
+        skipped_pages = []
+        for counts, positions, skipped in pool.map(_statistics_range,
+                                                      *zip(*[(pdf_path, s, e, decode) for s, e in ranges])):
+            font_size_counts.update(counts)
+            line_positions.update(positions)
+            skipped_pages.extend(skipped)
+        if not font_size_counts:
+            return None, [], skipped_pages
+        skip_pages = frozenset(s["page"] - 1 for s in skipped_pages)
+
+        body_font_size = font_size_counts.most_common(1)[0][0]
+        font_thresholds = font_thresholds_for(body_font_size)
+        text_page_count = page_count - len(skip_pages)
+        boilerplate = find_boilerplate(line_positions, text_page_count) if strip_boilerplate else frozenset()
+        if stage_sec is not None:
+            stage_sec["statistics"] = time.perf_counter() - t0
+        futures = [pool.submit(_segment_range, pdf_path, s, e, font_thresholds, body_font_size, with_nlp,
+                               boilerplate, skip_pages, decode, keywords)
+                   for s, e in ranges]
+
+        outline = []
+        open_sections = []
+        for future in futures:
+            leading, sections = future.result()
+            # Lines before the first heading of a range continue the previous range's last section
+            if leading and outline:
+                outline[-1]["paragraphs"].extend(leading)
+            if sections:
+                open_sections.append(sections[-1])
+            outline.extend(sections)
+
+    # Range tails were left open by their workers, so none of them is annotated yet
+    for section in open_sections:
+        if section["paragraphs"]:
+            annotate_section(section, with_nlp, keywords)
+    return body_font_size, outline, skipped_pages
+
+# ------------------------ Core Processing ------------------------
+def extract_document_outline(pdf_path, with_nlp: bool = True, workers: int = 1,
+                             min_pages_per_worker: int = 25, name: str = None, toc_first: bool = False,
+                             strip_boilerplate: bool = False, decode=None, keywords: str = "yake",
+                             stats: dict = None) -> dict:
+    """pdf_path is a Path or an in-memory PDF (bytes, memoryview, mmap); name labels in-memory input.
+
+    With toc_first, a plausible embedded outline whose entries are found in the
+    page text places the bookmarked headings; the heading heuristic still runs
+    on pages without entries and after a page's last entry.
+    With strip_boilerplate, lines in the top/bottom page margins repeated at the
+    same height on at least half the pages (running headers/footers) are
+    removed during segmentation.
+    Pages without extractable text (scans, blank pages) are found by the
+    font-statistics decode, never segmented, and listed in "skipped_pages".
+    decode comes from decode_options().
+    keywords picks the keyword backend from KEYWORD_BACKENDS. A stats dict is
+    filled with page/section/keyword counts and per-stage seconds.
+    """
+    require_keyword_backend(keywords)
+    source = pdf_path
+    pdf_path = Path(name) if name else Path(str(source) if not is_in_memory(source) else "document.pdf")
+    title = ""
+    outline = []
+    toc = []
+    skipped_pages = []
+    page_count = 0
+    stage_sec = {}
+    doc = None
+
+    try:
+        t0 = time.perf_counter()
+        doc = open_pdf(source)
+        page_count = doc.page_count
+
+        raw_toc = doc.get_toc()
+        for item in raw_toc:
+            level, text, page = item
+            toc.append({"level": level, "text": text.strip(), "page": page})
+
+        toc_headings = {}
+        if toc_first and toc_is_plausible(toc, doc.page_count):
+            toc_headings = toc_headings_by_page(toc, doc.page_count)
+            # Bookmarks that mostly don't appear in the text (renamed, drawn as images) would only
+            # open empty sections, so such a TOC is ignored
+            if toc_match_ratio(doc, toc_headings, decode) < TOC_MIN_MATCHED:
+                toc_headings = {}
+        heuristic_pages = [p for p in range(doc.page_count) if p not in toc_headings]
+        stage_sec["open"] = time.perf_counter() - t0
+
+        # Split long documents across processes; short ones are not worth the pool start-up.
+        # In-memory input stays in one process rather than pickling a copy to every worker,
+        # and the TOC path stays in one process because its bookmarks are placed page by page.
+        workers = 1 if is_in_memory(source) or toc_headings else min(workers, doc.page_count // min_pages_per_worker)
+        t0 = time.perf_counter()
+        if workers > 1:
+            body_font_size, outline, skipped_pages = segment_parallel(
+                source, doc.page_count, workers, with_nlp, strip_boilerplate,
+                decode=decode, keywords=keywords, stage_sec=stage_sec)
+            if body_font_size is None:
+                return {"title": "No Title Found", "outline": [], "toc": toc, "skipped_pages": skipped_pages}
+            # Same stage names as the serial path: the rest of segment_parallel's time is segmentation
+            t0 += stage_sec["statistics"]
+        else:
+            # Font statistics only matter where the heuristic runs; the same decode finds the empty pages
+            font_size_counts, line_positions = page_statistics(doc, heuristic_pages, decode, skipped_pages)
+            if not font_size_counts and toc_headings:
+                # Every heuristic page is empty: take the body size from the first bookmarked page with text
+                font_size_counts = next((counts for counts in (page_statistics(doc, [p], decode)[0]
+                                                               for p in sorted(toc_headings)) if counts), Counter())
+            if not font_size_counts:
+                return {"title": "No Title Found", "outline": [], "toc": toc, "skipped_pages": skipped_pages}
+            body_font_size = font_size_counts.most_common(1)[0][0]
+
+            boilerplate = frozenset()
+            if strip_boilerplate:
+                text_page_count = len(heuristic_pages) - len(skipped_pages)
+                if not text_page_count and toc_headings:
+                    # Every text page is bookmarked; running headers show up in an even sample of pages
+                    position_pages = range(0, doc.page_count, max(1, doc.page_count // 20))
+                    empty_samples = []
+                    line_positions = page_statistics(doc, position_pages, decode, empty_samples)[1]
+                    text_page_count = len(position_pages) - len(empty_samples)
+                boilerplate = find_boilerplate(line_positions, text_page_count)
+            stage_sec["statistics"] = time.perf_counter() - t0
+            t0 = time.perf_counter()
+
+        skip_pages = {s["page"] - 1 for s in skipped_pages}
+        if doc.page_count and 0 not in skip_pages:
+            potential_titles = []
+            for line in page_text_lines(doc.load_page(0), decode):
+                for span in line['spans']:
+                    if span['text'].strip() and span['size'] > (body_font_size + 2):
+                        potential_titles.append((span['size'], span['text'].strip()))
+            if potential_titles:
+                potential_titles.sort(key=lambda x: (-x[0], x[1]))
+                title = potential_titles[0][1]
+
+        if workers <= 1:
+            state = {"current": None, "prev_y": None, "outline": outline, "keywords": keywords,
+                     "skipped_pages": skipped_pages}
+            # Bookmarked pages were not triaged yet; scanned ones still open their TOC entries' sections
+            pages = [p for p in range(doc.page_count) if p not in skip_pages]
+            segment_pages(doc, pages, font_thresholds_for(body_font_size), body_font_size,
+                          state, with_nlp, toc_headings, boilerplate, decode)
+            skipped_pages.sort(key=lambda s: s["page"])
+            current_section = state["current"]
+            if current_section and current_section["paragraphs"]:
+                annotate_section(current_section, with_nlp, keywords)
+        # Includes per-section NLP, which runs as sections close
+        stage_sec["segmentation"] = time.perf_counter() - t0
+
+        if with_nlp and keywords == "tfidf":
+            sections = [section for section in outline if section["paragraphs"]]
+            t0 = time.perf_counter()
+            for section, section_keywords in zip(sections, extract_keywords_tfidf(map(section_text, sections))):
+                section["keywords"] = section_keywords
+            stage_sec["tfidf"] = time.perf_counter() - t0
+
+    except Exception as e:
+        print(f"Error processing {pdf_path}: {e}")
+        title = f"Error processing {pdf_path.name}"
+        outline = []
+
+    finally:
+        if doc is not None:
+            doc.close()
+
+    if not title:
+        title = pdf_path.stem.replace("_", " ").title()
+
+    # Clean the data before returning
+    title = clean_text(title)
+    toc = [{"level": t["level"], "text": clean_text(t["text"]), "page": t["page"]} for t in toc]
+    outline = [clean_section_data(section) for section in outline]
+
+    if stats is not None:
+        stats.update({
+            "pages": page_count,
+            "skipped_pages": len(skipped_pages),
+            "sections": len(outline),
+            "keywords": sum(len(section["keywords"]) for section in outline),
+            "stage_sec": stage_sec
+        })
+    
+    return {
+        "title": title,
+        "toc": toc,
+        "outline": outline,
+        "skipped_pages": skipped_pages
+    }
+
+
+# ------------------------ Decode Benchmark ------------------------
+def benchmark_decode(source, profiles=DECODE_PROFILES, clip_margins=None, repeat: int = 3) -> dict:
+    """Time get_text('dict') over every text page per decode profile, against the default flags."""
+    doc = open_pdf(source)
+    try:
+        # Pages whose resources name no font cannot carry text
+        text_pages = [p for p in range(doc.page_count) if doc.load_page(p).get_fonts()]
+        report = {}
+        for profile in profiles:
+            decode = decode_options(profile, clip_margins if profile != "default" else None)
+            best = None
+            for _ in range(repeat):
+                t0 = time.perf_counter()
+                lines = [line for p in text_pages for line in page_text_lines(doc.load_page(p), decode)]
+                elapsed = time.perf_counter() - t0
+                best = elapsed if best is None else min(best, elapsed)
+            report[profile] = {
+                "sec": round(best, 4),
+                "lines": len(lines),
+                "chars": sum(len(span["text"]) for line in lines for span in line["spans"])
+            }
+        base = report.get("default", {}).get("sec")
+        for profile, row in report.items():
+            if base:
+                row["speedup"] = round(base / row["sec"], 2) if row["sec"] else None
+        return report
+    finally:
+        doc.close()
@@ -0,0 +1,148 @@
+import json
+import math
+import os
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+PREFIX = "pdf_pipeline_"
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+def percentile(sorted_values, q: float) -> float:
+    # Nearest-rank percentile of an already sorted list
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(q / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+# ------------------------ Registry ------------------------
+class Metrics:
+    """Counters, gauges and latency histograms for one batch run (main process only).
+
+    Latencies keep their raw samples, so the end-of-run summary has exact
+    p50/p95/p99; the Prometheus export uses fixed buckets.
+    """
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counters = Counter()
+        self.gauges = {}
+        self.samples = defaultdict(list)
+        self.lock = threading.Lock()  # the HTTP endpoint renders from another thread
+        self.started = time.time()
+
+    def inc(self, name: str, value: float = 1):
+        with self.lock:
+            self.counters[name] += value
+
+    def set_gauge(self, name: str, value: float):
+        with self.lock:
+            self.gauges[name] = value
+
+    def observe(self, name: str, seconds: float):
+        with self.lock:
+            self.samples[name].append(seconds)
+
+    @contextmanager
+    def timer(self, name: str):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - t0)
+
+    def summary(self) -> dict:
+        with self.lock:
+            latency = {}
+            for name, values in sorted(self.samples.items()):
+                ordered = sorted(values)
+                latency[name] = {
+                    "count": len(ordered),
+                    "sum": round(sum(ordered), 4),
+                    "p50": round(percentile(ordered, 50), 4),
+                    "p95": round(percentile(ordered, 95), 4),
+                    "p99": round(percentile(ordered, 99), 4),
+                    "max": round(ordered[-1], 4)
+                }
+            elapsed = time.time() - self.started
+            return {
+                "elapsed_sec": round(elapsed, 3),
+                "counters": dict(sorted(self.counters.items())),
+                "throughput_per_sec": {name: round(value / elapsed, 3) if elapsed else 0.0
+                                       for name, value in sorted(self.counters.items())},
+                "gauges": dict(sorted(self.gauges.items())),
+                "latency_sec": latency
+            }
+
+    # ------------------------ Prometheus Text Format ------------------------
+    def render(self) -> str:
+        lines = []
+        with self.lock:
+            for name, value in sorted(self.counters.items()):
+                lines += [f"# TYPE {PREFIX}{name}_total counter", f"{PREFIX}{name}_total {value}"]
+            for name, value in sorted(self.gauges.items()):
+                lines += [f"# TYPE {PREFIX}{name} gauge", f"{PREFIX}{name} {value}"]
+            for name, values in sorted(self.samples.items()):
+                metric = f"{PREFIX}{name}_seconds"
+                lines.append(f"# TYPE {metric} histogram")
+                for bound in self.buckets:
+                    lines.append(f'{metric}_bucket{{le="{bound}"}} {sum(1 for v in values if v <= bound)}')
+                lines.append(f'{metric}_bucket{{le="+Inf"}} {len(values)}')
+                lines += [f"{metric}_sum {sum(values)}", f"{metric}_count {len(values)}"]
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: Path):
+        # Written atomically so a node_exporter textfile collector never reads half a file
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f".{path.name}.tmp")
+        tmp.write_text(self.render(), encoding="utf-8")
+        os.replace(tmp, path)
+
+    def write_summary(self, path: Path) -> dict:
+        summary = self.summary()
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+        return summary
+
+    def serve(self, port: int, host: str = "127.0.0.1"):
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = metrics.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+    def print_summary(self):
+        summary = self.summary()
+        print(f"📈 Metrics after {summary['elapsed_sec']:.2f} sec: " +
+              ", ".join(f"{name}={value:g}" for name, value in summary["counters"].items()))
+        for name, row in summary["latency_sec"].items():
+            print(f"   {name}: n={row['count']} p50={row['p50']:.3f}s p95={row['p95']:.3f}s "
+                  f"p99={row['p99']:.3f}s max={row['max']:.3f}s")
+
+# Process-wide registry used by the batch entry points
+METRICS = Metrics()
+
+def record_document(stats: dict, elapsed: float, metrics: Metrics = METRICS):
+    """Fold the stats dict filled by extract_document_outline (possibly in a worker) into the registry."""
+    metrics.inc("documents")
+    metrics.observe("document", elapsed)
+    for name in ("pages", "skipped_pages", "sections", "keywords"):
+        metrics.inc(name, stats.get(name, 0))
+    for stage, seconds in stats.get("stage_sec", {}).items():
+        metrics.observe(stage, seconds)
@@ -1,11 +1,27 @@
-# nlp_utils.py
+# pdf_pipeline/nlp_utils.py
 
+import os
 import re
-import spacy
+from collections import Counter
 from typing import List, Dict
 
-# Load English model once
-nlp = spacy.load("en_core_web_sm")
+# Loaded on first use so importing this module stays cheap (SPACY_MODEL may point at a local model directory)
+_nlp = None
+_spacy_model = os.environ.get("SPACY_MODEL", "en_core_web_sm")
+
+def get_nlp():
+    global _nlp
+    if _nlp is None:
+        import spacy
+        _nlp = spacy.load(_spacy_model)
+    return _nlp
+
+def load_spacy(name_or_path: str):
+    global _nlp, _spacy_model
+    if name_or_path != _spacy_model or _nlp is None:
+        _spacy_model = name_or_path
+        _nlp = None
+    return get_nlp()
 
 # 1. Clean raw text
 def clean_text(text: str) -> str:
@@ -16,7 +32,7 @@ def clean_text(text: str) -> str:
 
 # 2. Tokenize + POS tag + Lemmatize
 def analyze_text(text: str) -> Dict:
-    doc = nlp(text)
+    doc = get_nlp()(text)
 
     tokens = []
     nouns = []
@@ -36,10 +52,12 @@ def analyze_text(text: str) -> Dict:
         "tokens": tokens,
         "nouns": list(set(nouns)),
         "verbs": list(set(verbs)),
-        "lemmas": list(set(lemmas))
+        "lemmas": list(set(lemmas)),
+        # Term frequencies for BM25; "lemmas" above is deduplicated
+        "lemma_counts": dict(Counter(lemmas))
     }
 
 # 3. Segment text into sentences
 def get_sentences(text: str) -> List[str]:
-    doc = nlp(text)
+    doc = get_nlp()(text)
     return [sent.text.strip() for sent in doc.sents if len(sent.text.strip()) > 5]
@@ -0,0 +1,263 @@
+"""Performance regression gate: python -m pdf_pipeline.perf_gate [--update-baseline]
+
+Runs a fixed workload: outline extraction over the 1A sample PDFs and the 1B
+collections, then YAKE keywords for a fixed sample of the 1B sections, and BM25
+indexing and scoring over all of them. It measures per-stage time, and the peak
+RSS of each workload run alone in a child process, and compares them with
+perf_baseline.json. Times are divided by a pure-Python calibration loop, so a
+baseline recorded on one machine still applies on another. Exits 1 on
+regression.
+
+spaCy annotation is left out. Its cost is set by the pinned model rather than
+by this repo's code, and the gate has to run where no model is installed.
+"""
+
+import argparse
+import json
+import platform
+import re
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from pathlib import Path
+
+import fitz
+
+from .extraction import extract_document_outline, extract_keywords_yake, section_text
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+BASELINE_PATH = Path(__file__).resolve().parent / "perf_baseline.json"
+
+WORKLOADS = {
+    "1a_outline": [REPO_ROOT / "Challenge_1a" / "sample_dataset" / "pdfs"],
+    "1b_outline": sorted((REPO_ROOT / "Challenge_1b" / "collections").glob("*/PDFs")),
+}
+# YAKE takes ~0.15 sec per section, so only every KEYWORD_SAMPLE-th 1B section is keyworded
+KEYWORD_SAMPLE = 20
+# BM25 runs the section text of every KEYWORD_SAMPLE-th 1B section as a query; one index build
+# takes ~0.08 sec, so the index stage times BM25_BUILDS of them to stay well above --min-seconds
+BM25_BUILDS = 5
+WORD = re.compile(r"[a-z0-9]+")
+
+# ------------------------ Calibration ------------------------
+def calibration_loop(n: int = 200_000) -> int:
+    # Same mix as the pipeline's hot Python code: string building, regex, dict counting, sorting
+    counts = Counter()
+    word = re.compile(r"[a-z]+")
+    for i in range(n):
+        counts[len(word.findall(f"section {i} heading text {i % 97}"))] += i & 7
+    return sum(sorted(counts.values()))
+
+def calibrate(repeat: int = 5) -> float:
+    """Best-of-repeat seconds for calibration_loop(); the unit all stage timings are divided by."""
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        calibration_loop()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+# ------------------------ Workload ------------------------
+def workload_pdfs(name: str) -> list:
+    return [pdf for folder in WORKLOADS[name] for pdf in sorted(folder.glob("*.pdf"))]
+
+def run_outlines(pdfs) -> tuple:
+    # Fixed options: one process, no spaCy, default decode, so only code changes move the numbers
+    stage_sec = Counter()
+    outlines = []
+    for pdf in pdfs:
+        stats = {}
+        t0 = time.perf_counter()
+        outlines.append((pdf.name, extract_document_outline(pdf, with_nlp=False, workers=1, stats=stats)))
+        stage_sec["document"] += time.perf_counter() - t0
+        stage_sec.update(stats.get("stage_sec", {}))
+    return dict(stage_sec), outlines
+
+def run_keywords(outlines) -> dict:
+    # The YAKE + filter_keywords part of annotate_section; the keywords then feed the BM25 stage
+    sections = [section for _, outline in outlines for section in outline["outline"] if section["paragraphs"]]
+    t0 = time.perf_counter()
+    for section in sections[::KEYWORD_SAMPLE]:
+        section["keywords"] = extract_keywords_yake(section_text(section))
+    return {"yake": time.perf_counter() - t0}
+
+def run_bm25(outlines) -> dict:
+    sys.path.append(str(REPO_ROOT / "Challenge_1b"))
+    from semantic_matcher import collect_chunks
+    from lexical_index import BM25Index
+
+    chunks = [chunk for name, outline in outlines for chunk in collect_chunks(outline, name)]
+    for chunk in chunks:
+        # Stand-in for spaCy's lemma_counts: the lowercased words, so postings have real size
+        chunk["semantic"] = {"lemma_counts": dict(Counter(WORD.findall(chunk["text"].lower())))}
+    queries = [list(chunk["semantic"]["lemma_counts"]) for chunk in chunks[::KEYWORD_SAMPLE]]
+
+    t0 = time.perf_counter()
+    for _ in range(BM25_BUILDS):
+        index = BM25Index.from_chunks(chunks)
+    t1 = time.perf_counter()
+    for terms in queries:
+        index.top_n(terms, 100)
+    return {"bm25_index": t1 - t0, "bm25_score": time.perf_counter() - t1}
+
+def run_workload(name: str, outlines_1b=None) -> tuple:
+    if name == "1b_keywords":
+        return run_keywords(outlines_1b), None
+    if name == "1b_bm25":
+        return run_bm25(outlines_1b), None
+    return run_outlines(workload_pdfs(name))
+
+def peak_rss_mb() -> float:
+    # On Linux ru_maxrss survives exec, so a child would report the parent's peak at fork time;
+    # VmHWM belongs to this process image only
+    try:
+        with open("/proc/self/status", "r", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 2 ** 10
+    except OSError:
+        pass
+    import resource
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return peak / (2 ** 20 if sys.platform == "darwin" else 2 ** 10)
+
+def measure_peak_rss(name: str, outlines_path: Path) -> float:
+    """Peak RSS (MB) of one pass of the workload, alone in a fresh interpreter.
+
+    The child reports its own peak: RUSAGE_CHILDREN in this process would be
+    the maximum over every child so far, not the peak of this workload.
+    """
+    command = [sys.executable, "-m", "pdf_pipeline.perf_gate", "--peak-rss-of", name, "--outlines", str(outlines_path)]
+    result = subprocess.run(command, cwd=REPO_ROOT, capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])["peak_rss_mb"]
+
+def measure(repeat: int = 3, calibration=None) -> dict:
+    """Best-of-repeat seconds per stage and peak RSS per workload.
+
+    The first pass is an untimed warm-up (YAKE loading, OS file cache).
+    Memory is measured in a child process per workload (measure_peak_rss), so
+    one workload's allocations never hide another's.
+    A calibration sample is appended to the calibration list before every
+    timed pass, so the calibration sees the same machine state as the workload.
+    """
+    calibration = [] if calibration is None else calibration
+    results = {}
+    outlines_1b = run_outlines(workload_pdfs("1b_outline"))[1]
+    with tempfile.TemporaryDirectory() as tmp:
+        outlines_path = Path(tmp) / "outlines_1b.json"
+        with open(outlines_path, "w", encoding="utf-8") as f:
+            json.dump(outlines_1b, f)
+
+        for name in ("1a_outline", "1b_outline", "1b_keywords", "1b_bm25"):
+            run_workload(name, outlines_1b)
+            best = {}
+            for _ in range(repeat):
+                calibration.append(calibrate(1))
+                for stage, seconds in run_workload(name, outlines_1b)[0].items():
+                    best[stage] = min(best.get(stage, seconds), seconds)
+
+            results[name] = {"stages_sec": {stage: round(seconds, 4) for stage, seconds in sorted(best.items())},
+                             "peak_rss_mb": round(measure_peak_rss(name, outlines_path), 1)}
+            print(f"⏱️  {name}: " + ", ".join(f"{s}={v:.3f}s" for s, v in results[name]["stages_sec"].items()) +
+                  f", peak RSS {results[name]['peak_rss_mb']:.1f} MB")
+    return results
+
+# ------------------------ Comparison ------------------------
+def compare(current: dict, baseline: dict, tolerance: float = 0.25, memory_tolerance: float = 0.2,
+            min_seconds: float = 0.05) -> list:
+    """Return one row per regressed stage/peak RSS; timings are compared in calibration units.
+
+    Stages shorter than min_seconds in the baseline are too noisy to gate on.
+    """
+    regressions = []
+    for name, base in baseline["workloads"].items():
+        run = current["workloads"].get(name)
+        if run is None:
+            regressions.append({"workload": name, "metric": "missing", "baseline": None, "current": None})
+            continue
+        for stage, base_sec in base["stages_sec"].items():
+            if stage not in run["stages_sec"] or base_sec < min_seconds:
+                continue
+            base_units = base_sec / baseline["calibration_sec"]
+            units = run["stages_sec"][stage] / current["calibration_sec"]
+            if units > base_units * (1 + tolerance):
+                regressions.append({"workload": name, "metric": f"{stage} (units)",
+                                    "baseline": round(base_units, 3), "current": round(units, 3)})
+        if run["peak_rss_mb"] > base["peak_rss_mb"] * (1 + memory_tolerance):
+            regressions.append({"workload": name, "metric": "peak_rss_mb",
+                                "baseline": base["peak_rss_mb"], "current": run["peak_rss_mb"]})
+    return regressions
+
+# ------------------------ CLI ------------------------
+def build_parser():
+    parser = argparse.ArgumentParser(description="Fail when the fixed PDF workload got slower or hungrier")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--update-baseline", action="store_true",
+                        help="Record this run as the new baseline instead of comparing")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="Allowed slowdown per stage after calibration (0.25 = 25%%)")
+    parser.add_argument("--memory-tolerance", type=float, default=0.2, help="Allowed growth of peak RSS")
+    parser.add_argument("--min-seconds", type=float, default=0.05,
+                        help="Ignore stages whose baseline time is below this")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed passes per workload (best is kept)")
+    parser.add_argument("--report", type=Path, help="Write the measurements and regressions as JSON")
+    # Internal: the child process of measure_peak_rss
+    parser.add_argument("--peak-rss-of", choices=["1a_outline", "1b_outline", "1b_keywords", "1b_bm25"],
+                        help=argparse.SUPPRESS)
+    parser.add_argument("--outlines", type=Path, help=argparse.SUPPRESS)
+    return parser
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+
+    if args.peak_rss_of:
+        outlines_1b = None
+        if args.peak_rss_of in ("1b_keywords", "1b_bm25"):
+            with open(args.outlines, "r", encoding="utf-8") as f:
+                outlines_1b = json.load(f)
+        run_workload(args.peak_rss_of, outlines_1b)
+        print(json.dumps({"peak_rss_mb": peak_rss_mb()}))
+        return 0
+
+    # Noise only ever slows a run down, so the fastest calibration sample is the machine's speed
+    calibration = [calibrate()]
+    workloads = measure(args.repeat, calibration)
+    calibration_sec = min(calibration)
+    print(f"📏 Calibration loop: {calibration_sec:.4f} sec (fastest of {len(calibration)} samples)")
+    current = {"calibration_sec": round(calibration_sec, 5),
+               "python": platform.python_version(),
+               "pymupdf": fitz.VersionBind,
+               "machine": platform.platform(),
+               "workloads": workloads}
+
+    if args.update_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(current, f, indent=2)
+        print(f"✅ Baseline written to {args.baseline}")
+        return 0
+
+    if not args.baseline.exists():
+        print(f"❌ No baseline at {args.baseline}; record one with --update-baseline and commit it")
+        return 2
+    with open(args.baseline, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+
+    regressions = compare(current, baseline, args.tolerance, args.memory_tolerance, args.min_seconds)
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump({"current": current, "regressions": regressions}, f, indent=2)
+
+    if regressions:
+        print(f"❌ {len(regressions)} performance regression(s) against {args.baseline.name}:")
+        for row in regressions:
+            print(f"   {row['workload']} {row['metric']}: {row['baseline']} -> {row['current']}")
+        return 1
+    print(f"✅ No regressions (tolerance {args.tolerance:.0%} time, {args.memory_tolerance:.0%} memory)")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
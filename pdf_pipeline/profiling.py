@@ -0,0 +1,119 @@
+import cProfile
+import fnmatch
+import io
+import os
+import pstats
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+
+# ------------------------ Time by Library ------------------------
+def library_of(file_name: str, func_name: str) -> str:
+    path = file_name.replace("\\", "/").lower()
+    if "fitz" in path or "pymupdf" in path:
+        return "pymupdf"
+    if "yake" in path:
+        return "yake"
+    if "spacy" in path or "thinc" in path:
+        return "spacy"
+    if "re.pattern" in func_name.lower() or path.endswith(("/re.py", "/re/__init__.py", "/re/_compiler.py")):
+        return "re"
+    if "pdf_pipeline" in path:
+        return "pdf_pipeline"
+    return "other"
+
+def time_by_library(stats: pstats.Stats) -> dict:
+    totals = Counter()
+    for (file_name, _, func_name), (_, _, own_time, _, _) in stats.stats.items():
+        totals[library_of(file_name, func_name)] += own_time
+    return {library: round(seconds, 4) for library, seconds in totals.most_common()}
+
+# ------------------------ Artifacts ------------------------
+def temp_path(path: Path) -> Path:
+    return path.with_name(f".{path.name}.{os.getpid()}.tmp")
+
+def write_atomic(path: Path, data: bytes):
+    tmp = temp_path(path)
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+def write_artifacts(name: str, artifact_dir: Path, profiler, elapsed: float, snapshot, peak, top: int = 25):
+    artifact_dir = Path(artifact_dir)
+    artifact_dir.mkdir(parents=True, exist_ok=True)
+    stem = Path(name).stem
+
+    # Binary stats for pstats / snakeviz
+    prof_path = artifact_dir / f"{stem}.prof"
+    profiler.dump_stats(temp_path(prof_path))
+    os.replace(temp_path(prof_path), prof_path)
+
+    report = io.StringIO()
+    report.write(f"document: {name}\nelapsed_sec: {elapsed:.3f}\npid: {os.getpid()}\n")
+    if peak is not None:
+        report.write(f"peak_traced_mb: {peak / 2 ** 20:.1f}\n")
+
+    stats = pstats.Stats(profiler, stream=report)
+    report.write("\n== Own time by library ==\n")
+    for library, seconds in time_by_library(stats).items():
+        report.write(f"{library:>14}  {seconds:.4f}s\n")
+
+    report.write("\n== Top functions by cumulative time ==\n")
+    stats.sort_stats("cumulative").print_stats(40)
+
+    if snapshot is not None:
+        report.write(f"== Top {top} allocations (tracemalloc) ==\n")
+        for stat in snapshot.statistics("lineno")[:top]:
+            report.write(f"{stat}\n")
+
+    write_atomic(artifact_dir / f"{stem}.profile.txt", report.getvalue().encode("utf-8"))
+
+# ------------------------ Profiling Hook ------------------------
+@contextmanager
+def profile_document(name: str, artifact_dir: Path, keep_after: float = 0.0, memory: bool = True, top: int = 25):
+    """Profile the enclosed block; write <stem>.prof and <stem>.profile.txt if it ran for keep_after seconds.
+
+    Every process (pool worker) profiles only its own document and writes
+    per-document files atomically, so workers never share a profiler or file.
+    """
+    started_tracing = memory and not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    elif memory:
+        tracemalloc.reset_peak()
+
+    profiler = cProfile.Profile()
+    t0 = time.perf_counter()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        elapsed = time.perf_counter() - t0
+        snapshot = peak = None
+        if memory:
+            peak = tracemalloc.get_traced_memory()[1]
+            snapshot = tracemalloc.take_snapshot().filter_traces((
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+            ))
+            if started_tracing:
+                tracemalloc.stop()
+        if elapsed >= keep_after:
+            write_artifacts(name, artifact_dir, profiler, elapsed, snapshot, peak, top)
+
+def document_profiler(name: str, artifact_dir: Path = None, docs=None, threshold: float = None):
+    """Context manager for one document: named documents are always kept, others only above threshold.
+
+    Without docs or threshold every document is profiled and kept.
+    """
+    if artifact_dir is None:
+        return nullcontext()
+    if docs and any(fnmatch.fnmatch(name, pattern) for pattern in docs):
+        return profile_document(name, artifact_dir)
+    if threshold is not None:
+        return profile_document(name, artifact_dir, keep_after=threshold)
+    if docs:
+        return nullcontext()
+    return profile_document(name, artifact_dir)
@@ -0,0 +1,50 @@
+import fnmatch
+import tarfile
+import time
+import zipfile
+from pathlib import Path, PurePosixPath
+
+ARCHIVE_SUFFIXES = (".zip", ".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tar.xz")
+
+def is_archive(path: Path) -> bool:
+    return path.is_file() and path.name.lower().endswith(ARCHIVE_SUFFIXES)
+
+# ------------------------ PDF Sources ------------------------
+def iter_pdf_sources(path: Path, pattern: str = "*.pdf", skip=None):
+    """Yield (name, source) for every PDF in a directory, a zip/tar bundle or a single file.
+
+    Directory and file entries yield a Path; archive members are read straight
+    into bytes for extract_document_outline, never written to disk. skip(name,
+    mtime) drops an entry before it is read.
+    """
+    path = Path(path)
+    if is_archive(path):
+        yield from _iter_archive(path, pattern, skip)
+        return
+
+    files = sorted(path.glob(pattern)) if path.is_dir() else [path]
+    for pdf_file in files:
+        if skip and skip(pdf_file.name, pdf_file.stat().st_mtime):
+            continue
+        yield pdf_file.name, pdf_file
+
+def _iter_archive(path: Path, pattern: str, skip):
+    if zipfile.is_zipfile(path):
+        with zipfile.ZipFile(path) as zf:
+            for info in sorted(zf.infolist(), key=lambda i: i.filename):
+                name = PurePosixPath(info.filename).name
+                if info.is_dir() or not fnmatch.fnmatch(name, pattern):
+                    continue
+                if skip and skip(name, time.mktime(info.date_time + (0, 0, -1))):
+                    continue
+                yield name, zf.read(info)
+        return
+
+    with tarfile.open(path) as tf:
+        for member in sorted(tf.getmembers(), key=lambda m: m.name):
+            name = PurePosixPath(member.name).name
+            if not member.isfile() or not fnmatch.fnmatch(name, pattern):
+                continue
+            if skip and skip(name, member.mtime):
+                continue
+            yield name, tf.extractfile(member).read()